@@ -1,21 +1,108 @@
 """Example API client for the image-to-tex REST API."""
 
-import httpx
+import asyncio
+import io
+import logging
+import os
+from contextlib import ExitStack
 from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+import anyio
+import httpx
+
+from image_to_tex.utils.image_handler import ImageHandler
+
+logger = logging.getLogger(__name__)
+
+# Connection pool shared by the sync and async clients. Keeping connections
+# alive between requests means a batch only pays the TCP handshake once.
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=50,
+    keepalive_expiry=60.0,
+)
+
+# Vision model calls have a long read tail but connecting is cheap, so fail
+# fast on connect/pool waits and allow slow reads.
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=60.0, write=30.0, pool=5.0)
+
+# Responses worth retrying: rate limiting and a temporarily busy server
+RETRY_STATUS_CODES = {429, 503}
+
+
+def _prepare_upload(image_path: Path, max_dimension: Optional[int]) -> Union[Path, bytes]:
+    """
+    Downscale an image before upload so large screenshots cost fewer bytes.
+
+    Returns the path to upload, or the downscaled bytes when the resize
+    cache is unavailable. A cached copy is shared through ImageHandler, so
+    callers must not delete it.
+    """
+    if max_dimension is None:
+        return image_path
+
+    upload = ImageHandler.preprocess_image(image_path, max_dimension=max_dimension)
+    upload_size = len(upload) if isinstance(upload, bytes) else upload.stat().st_size
+    logger.info(
+        f"Uploading {image_path.name}: {image_path.stat().st_size} bytes "
+        f"-> {upload_size} bytes"
+    )
+    return upload
+
+
+def _open_upload(upload: Union[Path, bytes]) -> BinaryIO:
+    """Open a prepared upload as a binary file object."""
+    if isinstance(upload, bytes):
+        return io.BytesIO(upload)
+    return open(upload, "rb")
+
+
+def _build_form_data(
+    content_type: str = "auto",
+    inline: bool = False,
+    caption: str = None,
+    title: str = None,
+    author: str = None,
+) -> dict:
+    """Build the form fields for a /convert request."""
+    data = {"content_type": content_type}
+
+    if inline:
+        data["inline"] = "true"
+    if caption:
+        data["caption"] = caption
+    if title:
+        data["title"] = title
+    if author:
+        data["author"] = author
+
+    return data
 
 
 class ImageToLaTeXClient:
     """Simple client for the image-to-tex API."""
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_dimension: Optional[int] = 1536,
+    ):
         """
         Initialize the API client.
 
         Args:
             base_url: Base URL of the API server
+            max_dimension: Downscale images so neither side exceeds this
+                many pixels before uploading (None to upload as-is)
         """
         self.base_url = base_url
-        self.client = httpx.Client(base_url=base_url, timeout=30.0)
+        self.max_dimension = max_dimension
+        self.client = httpx.Client(
+            base_url=base_url,
+            timeout=DEFAULT_TIMEOUT,
+            limits=DEFAULT_LIMITS,
+        )
 
     def health_check(self) -> dict:
         """Check API health and available models."""
@@ -47,24 +134,53 @@ class ImageToLaTeXClient:
             Dictionary with conversion result
         """
         image_path = Path(image_path)
+        upload = _prepare_upload(image_path, self.max_dimension)
 
-        with open(image_path, "rb") as f:
+        with _open_upload(upload) as f:
             files = {"file": (image_path.name, f, "image/png")}
-            data = {"content_type": content_type}
-
-            if inline:
-                data["inline"] = "true"
-            if caption:
-                data["caption"] = caption
-            if title:
-                data["title"] = title
-            if author:
-                data["author"] = author
+            data = _build_form_data(content_type, inline, caption, title, author)
 
             response = self.client.post("/convert", files=files, data=data)
             response.raise_for_status()
             return response.json()
 
+    def convert_batch(
+        self,
+        image_paths: list[str],
+        content_type: str = "auto",
+        inline: bool = False,
+        caption: str = None,
+        title: str = None,
+        author: str = None,
+    ) -> list[dict]:
+        """
+        Convert several images to LaTeX in a single request.
+
+        The server accepts up to 16 images per batch.
+
+        Args:
+            image_paths: Paths to the image files
+            content_type: Type of content (equation, table, diagram, document, auto)
+            inline: Format equations as inline math
+            caption: Table caption
+            title: Document title
+            author: Document author
+
+        Returns:
+            List of per-image results (conversion result or error), in input order
+        """
+        with ExitStack() as stack:
+            files = []
+            for image_path in map(Path, image_paths):
+                upload = _prepare_upload(image_path, self.max_dimension)
+                f = stack.enter_context(_open_upload(upload))
+                files.append(("files", (image_path.name, f, "image/png")))
+            data = _build_form_data(content_type, inline, caption, title, author)
+
+            response = self.client.post("/convert/batch", files=files, data=data)
+            response.raise_for_status()
+            return response.json()["results"]
+
     def close(self):
         """Close the HTTP client."""
         self.client.close()
@@ -78,6 +194,119 @@ class ImageToLaTeXClient:
         self.close()
 
 
+class AsyncImageToLaTeXClient:
+    """
+    Async client for the image-to-tex API.
+
+    Holds one long-lived httpx.AsyncClient so concurrent conversions reuse
+    pooled connections instead of opening a new client per batch.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_dimension: Optional[int] = 1536,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        """
+        Initialize the async API client.
+
+        Args:
+            base_url: Base URL of the API server
+            max_dimension: Downscale images so neither side exceeds this
+                many pixels before uploading (None to upload as-is)
+            max_retries: Retries on 429/503 responses before giving up
+            backoff: Initial retry delay in seconds (doubled on each retry)
+        """
+        self.base_url = base_url
+        self.max_dimension = max_dimension
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Downscaling is CPU-bound; cap worker threads at the core count
+        self.preprocess_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=DEFAULT_TIMEOUT,
+            limits=DEFAULT_LIMITS,
+        )
+
+    async def health_check(self) -> dict:
+        """Check API health and available models."""
+        response = await self.client.get("/health")
+        response.raise_for_status()
+        return response.json()
+
+    async def convert_image(
+        self,
+        image_path: str,
+        content_type: str = "auto",
+        inline: bool = False,
+        caption: str = None,
+        title: str = None,
+        author: str = None,
+    ) -> dict:
+        """
+        Convert an image to LaTeX.
+
+        Args:
+            image_path: Path to the image file
+            content_type: Type of content (equation, table, diagram, document, auto)
+            inline: Format equations as inline math
+            caption: Table caption
+            title: Document title
+            author: Document author
+
+        Returns:
+            Dictionary with conversion result
+        """
+        image_path = Path(image_path)
+        upload = await anyio.to_thread.run_sync(
+            _prepare_upload,
+            image_path,
+            self.max_dimension,
+            limiter=self.preprocess_limiter,
+        )
+
+        # httpx reads file objects on the event loop, so read the (usually
+        # downscaled) image in a thread and upload the bytes. Retries then
+        # resend the same bytes instead of an already consumed file.
+        if isinstance(upload, bytes):
+            image_bytes = upload
+        else:
+            image_bytes = await asyncio.to_thread(upload.read_bytes)
+        files = {"file": (image_path.name, image_bytes, "image/png")}
+        data = _build_form_data(content_type, inline, caption, title, author)
+
+        response = await self._post_with_retry("/convert", files=files, data=data)
+        response.raise_for_status()
+        return response.json()
+
+    async def _post_with_retry(self, url: str, **kwargs) -> httpx.Response:
+        """POST with exponential backoff on rate-limit and busy responses."""
+        delay = self.backoff
+        for _ in range(self.max_retries):
+            response = await self.client.post(url, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            await asyncio.sleep(delay)
+            delay *= 2
+
+        return await self.client.post(url, **kwargs)
+
+    async def aclose(self):
+        """Close the HTTP client."""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.aclose()
+
+
 def example_basic_api_usage():
     """Basic API usage example."""
     print("=== Basic API Usage Example ===")
@@ -105,17 +334,19 @@ def example_batch_api_processing():
     # images = ["eq1.png", "eq2.png", "table1.png"]
     #
     # with ImageToLaTeXClient() as client:
-    #     for image_path in images:
-    #         try:
-    #             result = client.convert_image(image_path)
-    #             print(f"✓ Converted {image_path}")
+    #     # One request for the whole batch
+    #     results = client.convert_batch(images)
+    #
+    #     for image_path, result in zip(images, results):
+    #         if "error" in result:
+    #             print(f"✗ Failed to convert {image_path}: {result['detail']}")
+    #             continue
     #
-    #             # Save to file
-    #             output_path = Path(image_path).with_suffix(".tex")
-    #             output_path.write_text(result["latex_code"])
+    #         print(f"✓ Converted {image_path}")
     #
-    #         except httpx.HTTPError as e:
-    #             print(f"✗ Failed to convert {image_path}: {e}")
+    #         # Save to file
+    #         output_path = Path(image_path).with_suffix(".tex")
+    #         output_path.write_text(result["latex_code"])
 
     print("Example: Process multiple images in batch")
     print("Handles errors per image, saves results to .tex files")
@@ -125,36 +356,40 @@ def example_async_api_client():
     """Async API client example."""
     print("\n=== Async API Client Example ===")
 
-    import asyncio
-
-    async def convert_async(image_paths: list[str]):
-        """Convert multiple images asynchronously."""
-        async with httpx.AsyncClient(base_url="http://localhost:8000", timeout=30.0) as client:
-            tasks = []
-
-            for image_path in image_paths:
-                # Create async task for each image
-                with open(image_path, "rb") as f:
-                    files = {"file": (Path(image_path).name, f.read(), "image/png")}
-                    data = {"content_type": "auto"}
-                    task = client.post("/convert", files=files, data=data)
-                    tasks.append(task)
-
-            # Wait for all conversions
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for image_path, response in zip(image_paths, responses):
-                if isinstance(response, Exception):
-                    print(f"✗ {image_path}: {response}")
-                else:
-                    result = response.json()
-                    print(f"✓ {image_path}: {result['content_type']}")
+    async def convert_async(
+        client: AsyncImageToLaTeXClient,
+        image_paths: list[str],
+        concurrency: int = 10,
+    ):
+        """Convert multiple images with at most `concurrency` requests in flight."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def convert_one(image_path: str):
+            async with semaphore:
+                try:
+                    return image_path, await client.convert_image(image_path)
+                except Exception as e:
+                    # Report HTTP, file and image errors per image
+                    return image_path, e
+
+        # Report each result as soon as it finishes
+        tasks = [convert_one(image_path) for image_path in image_paths]
+        for next_result in asyncio.as_completed(tasks):
+            image_path, result = await next_result
+            if isinstance(result, Exception):
+                print(f"✗ {image_path}: {result}")
+            else:
+                print(f"✓ {image_path}: {result['content_type']}")
+
+    async def main(image_paths: list[str]):
+        async with AsyncImageToLaTeXClient() as client:
+            await convert_async(client, image_paths)
 
     # To run:
-    # asyncio.run(convert_async(["eq1.png", "eq2.png"]))
+    # asyncio.run(main(["eq1.png", "eq2.png"]))
 
     print("Example: Process images concurrently with async/await")
-    print("Faster for large batches with network latency")
+    print("Bounded concurrency keeps large batches within server rate limits")
 
 
 def example_error_handling_api():
@@ -192,6 +427,11 @@ def example_curl_commands():
     print('  -F "file=@equation.png" \\')
     print('  -F "content_type=equation"')
 
+    print("\nConvert several images in one request:")
+    print('curl -X POST "http://localhost:8000/convert/batch" \\')
+    print('  -F "files=@eq1.png" \\')
+    print('  -F "files=@eq2.png"')
+
     print("\nConvert table with caption:")
     print('curl -X POST "http://localhost:8000/convert" \\')
     print('  -F "file=@table.png" \\')
@@ -22,6 +22,9 @@ Advanced usage:
     >>> print(result.latex_code)
 """
 
+import functools
+from typing import Callable
+
 from .core.converter import (
     ConversionError,
     ConverterResult,
@@ -33,6 +36,7 @@ from .core.vision_client import (
     VisionClient,
     VisionClientError,
 )
+from .utils.cache import ConversionCache
 from .utils.image_handler import ImageHandler, ImageHandlerError
 from .utils.latex_formatter import ContentType, LaTeXFormatter
 
@@ -52,6 +56,7 @@ __all__ = [
     "ImageHandlerError",
     "LaTeXFormatter",
     "ContentType",
+    "ConversionCache",
     # Convenience functions
     "convert_image",
     "convert_equation",
@@ -59,13 +64,71 @@ __all__ = [
 ]
 
 
+@functools.lru_cache(maxsize=1)
+def _default_converter() -> ImageToLaTeXConverter:
+    """
+    Return the converter shared by the convenience functions.
+
+    Built once per process so repeated calls reuse the same vision client
+    and its pooled HTTP connections. Instantiate ImageToLaTeXConverter
+    directly if you need a different configuration.
+    """
+    return ImageToLaTeXConverter()
+
+
+@functools.lru_cache(maxsize=1)
+def _default_cache() -> ConversionCache:
+    """Return the on-disk cache used when a convenience function gets cache=True."""
+    return ConversionCache()
+
+
+def _cached_call(
+    kind: str,
+    image_path: str,
+    options: dict,
+    compute: Callable[[], ConverterResult],
+    render: Callable[[ConverterResult], object],
+):
+    """
+    Return a JSON-serializable result from the default cache, computing it on a miss.
+
+    Invalid results, including model refusals, are returned but not stored,
+    so a later call asks the model again.
+
+    Args:
+        kind: Name of the conversion, so different functions never share entries
+        image_path: Path to the image file
+        options: Conversion options that affect the result
+        compute: Runs the conversion on a cache miss
+        render: Turns the conversion result into the value to return and store
+    """
+    cache = _default_cache()
+    try:
+        key = cache.make_key(image_path, kind=kind, **options)
+    except OSError:
+        # Unreadable image: let the converter raise its usual error
+        return render(compute())
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached["value"]
+
+    result = compute()
+    value = render(result)
+    if result.is_valid:
+        cache.set(key, {"value": value})
+    return value
+
+
 # Convenience function for simple usage
-def convert_image(image_path: str, **kwargs) -> ConverterResult:
+def convert_image(image_path: str, cache: bool = False, **kwargs) -> ConverterResult:
     """
     Convert an image to LaTeX code (convenience function).
 
     Args:
         image_path: Path to the image file
+        cache: Reuse results for identical image content and options from the
+            on-disk cache (see ConversionCache)
         **kwargs: Additional arguments passed to ImageToLaTeXConverter.convert()
 
     Returns:
@@ -76,17 +139,32 @@ def convert_image(image_path: str, **kwargs) -> ConverterResult:
         >>> print(result.latex_code)
         >>> print(result.content_type)
     """
-    converter = ImageToLaTeXConverter()
-    return converter.convert(image_path, **kwargs)
+    if not cache:
+        return _default_converter().convert(image_path, **kwargs)
+
+    def render(result: ConverterResult) -> dict:
+        return {**result.to_dict(), "raw_response": result.raw_response}
 
+    return ConverterResult.from_dict(
+        _cached_call(
+            "convert",
+            image_path,
+            kwargs,
+            lambda: _default_converter().convert(image_path, **kwargs),
+            render,
+        )
+    )
 
-def convert_equation(image_path: str, inline: bool = False) -> str:
+
+def convert_equation(image_path: str, inline: bool = False, cache: bool = False) -> str:
     """
     Convert an image containing equations to LaTeX (convenience function).
 
     Args:
         image_path: Path to the image file
         inline: Whether to format as inline math
+        cache: Reuse results for identical image content and options from the
+            on-disk cache (see ConversionCache)
 
     Returns:
         Formatted LaTeX equation code
@@ -95,17 +173,27 @@ def convert_equation(image_path: str, inline: bool = False) -> str:
         >>> latex = convert_equation("formula.png")
         >>> print(latex)
     """
-    converter = ImageToLaTeXConverter()
-    return converter.convert_equation(image_path, inline=inline)
+    if not cache:
+        return _default_converter().convert_equation(image_path, inline=inline)
+
+    return _cached_call(
+        "equation",
+        image_path,
+        {"inline": inline},
+        lambda: _default_converter()._convert_latex(image_path, ContentType.EQUATION, None),
+        lambda result: LaTeXFormatter.wrap_equation(result.latex_code, inline=inline),
+    )
 
 
-def convert_table(image_path: str, caption: str = None) -> str:
+def convert_table(image_path: str, caption: str = None, cache: bool = False) -> str:
     """
     Convert an image containing a table to LaTeX (convenience function).
 
     Args:
         image_path: Path to the image file
         caption: Optional table caption
+        cache: Reuse results for identical image content and options from the
+            on-disk cache (see ConversionCache)
 
     Returns:
         Formatted LaTeX table code
@@ -114,5 +202,13 @@ def convert_table(image_path: str, caption: str = None) -> str:
         >>> latex = convert_table("data.png", caption="Experimental Results")
         >>> print(latex)
     """
-    converter = ImageToLaTeXConverter()
-    return converter.convert_table(image_path, caption=caption)
+    if not cache:
+        return _default_converter().convert_table(image_path, caption=caption)
+
+    return _cached_call(
+        "table",
+        image_path,
+        {"caption": caption},
+        lambda: _default_converter()._convert_latex(image_path, ContentType.TABLE, None),
+        lambda result: LaTeXFormatter.wrap_table(result.latex_code, caption=caption),
+    )
@@ -1,9 +1,12 @@
 """Pydantic models for API request/response."""
 
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+# Maximum number of images accepted by a single batch request
+MAX_BATCH_SIZE = 16
 
 
 class ContentTypeEnum(str, Enum):
@@ -16,6 +19,10 @@ class ContentTypeEnum(str, Enum):
     AUTO = "auto"
 
 
+# Direct value -> member lookup used to coerce incoming content type strings
+_CT_LOOKUP = {e.value: e for e in ContentTypeEnum}
+
+
 class ConversionRequest(BaseModel):
     """Request model for image conversion."""
 
@@ -39,16 +46,43 @@ class ConversionRequest(BaseModel):
         default=None,
         description="Document author (only for document type)",
     )
+    detail: Optional[Literal["low", "high"]] = Field(
+        default=None,
+        description="Vision detail level (default: chosen per content type)",
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "content_type": "equation",
                 "inline": False,
+                "detail": "high",
             }
         }
     )
 
+    @model_validator(mode="before")
+    @classmethod
+    def _normalize(cls, data):
+        """Normalize raw input in a single pass before field validation."""
+        if not isinstance(data, dict):
+            return data
+
+        data = dict(data)
+
+        # Resolve content type strings case-insensitively
+        content_type = data.get("content_type", ContentTypeEnum.AUTO)
+        if isinstance(content_type, str):
+            content_type = _CT_LOOKUP.get(content_type.lower(), content_type)
+            data["content_type"] = content_type
+
+        # Strip free-text fields, treating blank values as not provided
+        for name in ("caption", "title", "author"):
+            if isinstance(data.get(name), str):
+                data[name] = data[name].strip() or None
+
+        return data
+
 
 class ConversionResponse(BaseModel):
     """Response model for successful conversion."""
@@ -68,6 +102,8 @@ class ConversionResponse(BaseModel):
     )
 
     model_config = ConfigDict(
+        frozen=True,
+        extra="ignore",
         json_schema_extra={
             "example": {
                 "latex_code": "\\begin{equation}\\nE = mc^2\\n\\end{equation}",
@@ -91,6 +127,8 @@ class ErrorResponse(BaseModel):
     )
 
     model_config = ConfigDict(
+        frozen=True,
+        extra="ignore",
         json_schema_extra={
             "example": {
                 "error": "Conversion failed",
@@ -100,6 +138,32 @@ class ErrorResponse(BaseModel):
     )
 
 
+class RootResponse(BaseModel):
+    """Response model for the root endpoint."""
+
+    message: str = Field(
+        description="API name",
+    )
+    version: str = Field(
+        description="API version",
+    )
+    docs: str = Field(
+        description="Path to the interactive API documentation",
+    )
+
+    model_config = ConfigDict(
+        frozen=True,
+        extra="ignore",
+        json_schema_extra={
+            "example": {
+                "message": "Image-to-LaTeX API",
+                "version": "0.1.0",
+                "docs": "/docs",
+            }
+        }
+    )
+
+
 class HealthResponse(BaseModel):
     """Response model for health check."""
 
@@ -114,6 +178,8 @@ class HealthResponse(BaseModel):
     )
 
     model_config = ConfigDict(
+        frozen=True,
+        extra="ignore",
         json_schema_extra={
             "example": {
                 "status": "healthy",
@@ -125,3 +191,32 @@ class HealthResponse(BaseModel):
             }
         }
     )
+
+
+class BatchConversionResponse(BaseModel):
+    """Response model for batch conversion."""
+
+    results: list[Union[ConversionResponse, ErrorResponse]] = Field(
+        description="Conversion result or error for each image, in upload order",
+    )
+
+    model_config = ConfigDict(
+        frozen=True,
+        extra="ignore",
+        json_schema_extra={
+            "example": {
+                "results": [
+                    {
+                        "latex_code": "E = mc^2",
+                        "content_type": "equation",
+                        "is_valid": True,
+                        "validation_error": None,
+                    },
+                    {
+                        "error": "Conversion failed for blurry.png",
+                        "detail": "Vision model failed",
+                    },
+                ]
+            }
+        }
+    )
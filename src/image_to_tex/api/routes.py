@@ -1,24 +1,38 @@
 """FastAPI routes for image-to-tex API."""
 
+import asyncio
 import logging
 import os
+import shutil
 import tempfile
+from contextlib import asynccontextmanager
 from pathlib import Path
+from types import MappingProxyType
+from typing import Awaitable, Callable, Literal, Optional, Union
 
+import anyio.to_thread
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 
 from ..core.converter import ConversionError, ImageToLaTeXConverter
 from ..core.vision_client import NoAPIKeyError, VisionClient
-from ..utils.image_handler import ImageHandlerError
-from ..utils.latex_formatter import ContentType
+from ..utils.cache import ConversionCache
+from ..utils.image_handler import ImageHandler, ImageHandlerError
+from ..utils.latex_formatter import ContentType, LaTeXFormatter
 from .models import (
+    MAX_BATCH_SIZE,
+    BatchConversionResponse,
     ContentTypeEnum,
+    ConversionRequest,
     ConversionResponse,
     ErrorResponse,
     HealthResponse,
+    RootResponse,
 )
 
 # Load environment variables
@@ -28,8 +42,29 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Worker threads available for concurrent conversions
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "64"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the converter once before serving requests."""
+    # Conversions block a worker thread for the whole vision model call
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+
+    app.state.converter = None
+    try:
+        app.state.converter = ImageToLaTeXConverter()
+        logger.info("Image-to-LaTeX API started successfully")
+    except NoAPIKeyError as e:
+        logger.error(f"Failed to initialize: {e}")
+        logger.error("Please set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variable")
+    yield
+
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Image-to-LaTeX API",
     description="Convert images of scientific work to LaTeX code using vision AI models",
     version="0.1.0",
@@ -46,107 +81,234 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global converter instance
-converter: ImageToLaTeXConverter = None
+# Map ContentTypeEnum to internal ContentType
+_CONTENT_TYPE_MAP = MappingProxyType({
+    ContentTypeEnum.EQUATION: ContentType.EQUATION,
+    ContentTypeEnum.TABLE: ContentType.TABLE,
+    ContentTypeEnum.DIAGRAM: ContentType.DIAGRAM,
+    ContentTypeEnum.DOCUMENT: ContentType.DOCUMENT,
+    ContentTypeEnum.AUTO: None,
+})
 
+# Uploads up to this size are converted from memory without a temp file
+MAX_IN_MEM_MB = 8
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize converter on startup."""
-    global converter
-    try:
-        converter = ImageToLaTeXConverter()
-        logger.info("Image-to-LaTeX API started successfully")
-    except NoAPIKeyError as e:
-        logger.error(f"Failed to initialize: {e}")
-        logger.error("Please set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variable")
-
+# Conversions in progress, keyed by ConversionCache.make_key digest
+_inflight: dict[str, asyncio.Future] = {}
 
-@app.get("/", tags=["Root"])
-async def root():
-    """Root endpoint."""
-    return {
-        "message": "Image-to-LaTeX API",
-        "version": "0.1.0",
-        "docs": "/docs",
-    }
 
-
-@app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+def get_converter(request: Request) -> ImageToLaTeXConverter:
     """
-    Health check endpoint.
+    Return the converter created at startup.
 
-    Returns API status and available models.
+    Raises:
+        HTTPException: If the converter could not be initialized
     """
+    converter = getattr(request.app.state, "converter", None)
     if converter is None:
         raise HTTPException(
             status_code=503,
             detail="API not initialized. Check API keys configuration.",
         )
+    return converter
 
-    # Check which models are available
-    models_available = {
-        "claude": converter.vision_client.anthropic_client is not None,
-        "openai": converter.vision_client.openai_client is not None,
-    }
 
-    return HealthResponse(
-        status="healthy",
-        version="0.1.0",
-        models_available=models_available,
-    )
-
-
-@app.post(
-    "/convert",
-    response_model=ConversionResponse,
-    responses={
-        400: {"model": ErrorResponse, "description": "Bad request"},
-        500: {"model": ErrorResponse, "description": "Conversion failed"},
-    },
-    tags=["Conversion"],
-)
-async def convert_image(
-    file: UploadFile = File(..., description="Image file to convert"),
-    content_type: ContentTypeEnum = Form(
-        default=ContentTypeEnum.AUTO,
-        description="Type of content (auto-detect if not specified)",
+def conversion_options(
+    content_type: str = Form(
+        default=ContentTypeEnum.AUTO.value,
+        description=(
+            "Type of content: equation, table, diagram, document or auto "
+            "(case-insensitive, auto-detect if not specified)"
+        ),
     ),
     inline: bool = Form(
         default=False,
         description="Format equations as inline math (equation type only)",
     ),
-    caption: str = Form(
+    caption: Optional[str] = Form(
         default=None,
         description="Table caption (table type only)",
     ),
-    title: str = Form(
+    title: Optional[str] = Form(
         default=None,
         description="Document title (document type only)",
     ),
-    author: str = Form(
+    author: Optional[str] = Form(
         default=None,
         description="Document author (document type only)",
     ),
-):
+    detail: Optional[Literal["low", "high"]] = Form(
+        default=None,
+        description="Vision detail level (default: chosen per content type)",
+    ),
+) -> ConversionRequest:
     """
-    Convert an uploaded image to LaTeX code.
+    Build the conversion options from the form fields of a request.
 
-    Upload an image file and receive LaTeX code for the content.
-    Supports equations, tables, diagrams, and full documents.
+    Raises:
+        RequestValidationError: If the options are invalid (422 response)
+    """
+    try:
+        return ConversionRequest(
+            content_type=content_type,
+            inline=inline,
+            caption=caption,
+            title=title,
+            author=author,
+            detail=detail,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False)) from e
 
-    Example:
-        curl -X POST "http://localhost:8000/convert" \\
-             -F "file=@equation.png" \\
-             -F "content_type=equation"
+
+@app.get("/", response_model=RootResponse, tags=["Root"])
+async def root():
+    """Root endpoint."""
+    return RootResponse(
+        message="Image-to-LaTeX API",
+        version="0.1.0",
+        docs="/docs",
+    )
+
+
+@app.get("/health", response_model=HealthResponse, tags=["Health"])
+async def health_check(converter: ImageToLaTeXConverter = Depends(get_converter)):
     """
-    if converter is None:
-        raise HTTPException(
-            status_code=503,
-            detail="API not initialized. Check API keys configuration.",
+    Health check endpoint.
+
+    Returns API status and available models.
+    """
+    # Check which models are available
+    models_available = {
+        "claude": converter.vision_client.anthropic_client is not None,
+        "openai": converter.vision_client.openai_client is not None,
+    }
+
+    return HealthResponse(
+        status="healthy",
+        version="0.1.0",
+        models_available=models_available,
+    )
+
+
+async def _dispatch_conversion(
+    converter: ImageToLaTeXConverter,
+    image_source: Union[Path, bytes],
+    options: ConversionRequest,
+) -> ConversionResponse:
+    """Run the converter method for the content type in the threadpool."""
+    content_type = options.content_type
+    internal_content_type = _CONTENT_TYPE_MAP[content_type]
+
+    # Convert based on type
+    if content_type == ContentTypeEnum.EQUATION:
+        latex_code = await run_in_threadpool(
+            converter.convert_equation,
+            image_source,
+            inline=options.inline,
+            detail=options.detail,
+        )
+        result_content_type = "equation"
+    elif content_type == ContentTypeEnum.TABLE:
+        latex_code = await run_in_threadpool(
+            converter.convert_table,
+            image_source,
+            caption=options.caption,
+            detail=options.detail,
         )
+        result_content_type = "table"
+    elif content_type == ContentTypeEnum.DOCUMENT:
+        latex_code = await run_in_threadpool(
+            converter.convert_to_document,
+            image_source,
+            title=options.title,
+            author=options.author,
+            detail=options.detail,
+        )
+        result_content_type = "document"
+    else:
+        # Auto-detect
+        result = await run_in_threadpool(
+            converter.convert,
+            image_source,
+            content_type=internal_content_type,
+            detail=options.detail,
+        )
+        return ConversionResponse(
+            latex_code=result.latex_code,
+            content_type=result.content_type.value,
+            is_valid=result.is_valid,
+            validation_error=result.validation_error,
+        )
+
+    # The typed helpers return wrapped code, so validate it as convert() would
+    is_valid, validation_error = True, None
+    if converter.validate_output:
+        is_valid, validation_error = LaTeXFormatter.validate_latex(latex_code)
 
+    return ConversionResponse(
+        latex_code=latex_code,
+        content_type=result_content_type,
+        is_valid=is_valid,
+        validation_error=validation_error,
+    )
+
+
+async def _single_flight(
+    key: str, convert: Callable[[], Awaitable[ConversionResponse]]
+) -> ConversionResponse:
+    """
+    Run a conversion, or join an identical one that is already running.
+
+    Args:
+        key: Digest of the image content and conversion options
+        convert: Starts the conversion when none is in flight for key
+
+    Returns:
+        The conversion response, shared by every caller with the same key
+    """
+    # No await between the lookup and the insert, so no lock is needed
+    future = _inflight.get(key)
+    while future is not None:
+        logger.info("Joining an identical conversion already in progress")
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # This request was cancelled
+            # The request running the conversion went away; run it here
+            future = _inflight.get(key)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        response = await convert()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception retrieved in case nobody joined
+        future.exception()
+        raise
+    else:
+        future.set_result(response)
+        return response
+    finally:
+        del _inflight[key]
+
+
+async def _convert_upload(
+    converter: ImageToLaTeXConverter,
+    file: UploadFile,
+    options: ConversionRequest,
+) -> ConversionResponse:
+    """
+    Convert a single uploaded image.
+
+    Raises:
+        HTTPException: If the upload is invalid or conversion fails
+    """
     # Validate file type
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(
@@ -154,68 +316,57 @@ async def convert_image(
             detail=f"Invalid file type: {file.content_type}. Must be an image.",
         )
 
+    # The content type header is client-controlled, so check the file itself
+    header = await file.read(16)
+    await file.seek(0)
+    if ImageHandler.sniff_format(header) is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported image format: {file.filename}",
+        )
+
     temp_file_path = None
 
     try:
-        # Save uploaded file to temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = Path(temp_file.name)
-
-        logger.info(f"Processing image: {file.filename} ({len(content)} bytes)")
-
-        # Map ContentTypeEnum to internal ContentType
-        content_type_map = {
-            ContentTypeEnum.EQUATION: ContentType.EQUATION,
-            ContentTypeEnum.TABLE: ContentType.TABLE,
-            ContentTypeEnum.DIAGRAM: ContentType.DIAGRAM,
-            ContentTypeEnum.DOCUMENT: ContentType.DOCUMENT,
-            ContentTypeEnum.AUTO: None,
-        }
-        internal_content_type = content_type_map[content_type]
-
-        # Convert based on type
-        if content_type == ContentTypeEnum.EQUATION:
-            latex_code = converter.convert_equation(temp_file_path, inline=inline)
-            result_content_type = "equation"
-            is_valid = True
-            validation_error = None
-        elif content_type == ContentTypeEnum.TABLE:
-            latex_code = converter.convert_table(temp_file_path, caption=caption)
-            result_content_type = "table"
-            is_valid = True
-            validation_error = None
-        elif content_type == ContentTypeEnum.DOCUMENT:
-            latex_code = converter.convert_to_document(
-                temp_file_path, title=title, author=author
-            )
-            result_content_type = "document"
-            is_valid = True
-            validation_error = None
+        if file.size is not None and file.size <= MAX_IN_MEM_MB * 1024 * 1024:
+            # Small uploads are passed to the converter as bytes
+            image_source = await file.read()
+            file_size = len(image_source)
         else:
-            # Auto-detect
-            result = converter.convert(temp_file_path, content_type=internal_content_type)
-            latex_code = result.latex_code
-            result_content_type = result.content_type.value
-            is_valid = result.is_valid
-            validation_error = result.validation_error
+            # Stream larger uploads to a temporary location in fixed-size chunks
+            with tempfile.NamedTemporaryFile(
+                delete=False, suffix=Path(file.filename).suffix
+            ) as temp_file:
+                temp_file_path = Path(temp_file.name)
+                await run_in_threadpool(shutil.copyfileobj, file.file, temp_file, 64 * 1024)
+                file_size = temp_file.tell()
+            image_source = temp_file_path
+
+        logger.info(f"Processing image: {file.filename} ({file_size} bytes)")
+
+        # Identical uploads with identical options share one conversion
+        flight_key = await run_in_threadpool(
+            ConversionCache.make_key,
+            image_source,
+            **options.model_dump(mode="json"),
+        )
+        response = await _single_flight(
+            flight_key,
+            lambda: _dispatch_conversion(converter, image_source, options),
+        )
 
-        logger.info(f"Conversion successful: {result_content_type}")
+        logger.info(f"Conversion successful: {response.content_type}")
 
-        return ConversionResponse(
-            latex_code=latex_code,
-            content_type=result_content_type,
-            is_valid=is_valid,
-            validation_error=validation_error,
-        )
+        return response
 
     except ImageHandlerError as e:
         logger.error(f"Image validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
     except ConversionError as e:
         logger.error(f"Conversion error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        # An unreadable image is the client's fault, not a conversion failure
+        status_code = 400 if isinstance(e.__cause__, ImageHandlerError) else 500
+        raise HTTPException(status_code=status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
@@ -228,6 +379,80 @@ async def convert_image(
                 logger.warning(f"Failed to delete temporary file: {e}")
 
 
+@app.post(
+    "/convert",
+    response_model=ConversionResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        500: {"model": ErrorResponse, "description": "Conversion failed"},
+    },
+    tags=["Conversion"],
+)
+async def convert_image(
+    file: UploadFile = File(..., description="Image file to convert"),
+    options: ConversionRequest = Depends(conversion_options),
+    converter: ImageToLaTeXConverter = Depends(get_converter),
+):
+    """
+    Convert an uploaded image to LaTeX code.
+
+    Upload an image file and receive LaTeX code for the content.
+    Supports equations, tables, diagrams, and full documents.
+
+    Example:
+        curl -X POST "http://localhost:8000/convert" \\
+             -F "file=@equation.png" \\
+             -F "content_type=equation"
+    """
+    return await _convert_upload(converter, file, options)
+
+
+@app.post(
+    "/convert/batch",
+    response_model=BatchConversionResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad request"},
+    },
+    tags=["Conversion"],
+)
+async def convert_batch(
+    files: list[UploadFile] = File(..., description="Image files to convert"),
+    options: ConversionRequest = Depends(conversion_options),
+    converter: ImageToLaTeXConverter = Depends(get_converter),
+):
+    """
+    Convert several uploaded images to LaTeX code in one request.
+
+    The conversion options apply to every image. Failures are reported per
+    image, so one bad upload does not fail the whole batch.
+
+    Example:
+        curl -X POST "http://localhost:8000/convert/batch" \\
+             -F "files=@eq1.png" \\
+             -F "files=@eq2.png" \\
+             -F "content_type=equation"
+    """
+    if len(files) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files: {len(files)} (max: {MAX_BATCH_SIZE})",
+        )
+
+    async def convert_one(file: UploadFile):
+        try:
+            return await _convert_upload(converter, file, options)
+        except HTTPException as e:
+            return ErrorResponse(
+                error=f"Conversion failed for {file.filename}",
+                detail=e.detail,
+            )
+
+    # Convert concurrently; results keep the upload order
+    results = await asyncio.gather(*(convert_one(file) for file in files))
+
+    return BatchConversionResponse(results=results)
+
+
 # For running with uvicorn directly
 if __name__ == "__main__":
     import uvicorn
@@ -1,8 +1,13 @@
 """CLI commands for image-to-tex."""
 
+import functools
+import glob
 import logging
 import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional
 
 import click
@@ -10,7 +15,8 @@ from dotenv import load_dotenv
 
 from ..core.converter import ConversionError, ImageToLaTeXConverter
 from ..core.vision_client import NoAPIKeyError
-from ..utils.latex_formatter import ContentType
+from ..utils.image_handler import ImageHandler
+from ..utils.latex_formatter import ContentType, LaTeXFormatter
 
 # Load environment variables
 load_dotenv()
@@ -22,6 +28,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Map CLI type to ContentType enum
+_CONTENT_TYPE_MAP = MappingProxyType({
+    "equation": ContentType.EQUATION,
+    "table": ContentType.TABLE,
+    "diagram": ContentType.DIAGRAM,
+    "document": ContentType.DOCUMENT,
+    "auto": None,
+})
+
+
+@functools.lru_cache(maxsize=1)
+def _get_converter() -> ImageToLaTeXConverter:
+    """Return a converter shared by every command run in this process."""
+    return ImageToLaTeXConverter()
+
 
 @click.group()
 @click.version_option(version="0.1.0", prog_name="image-to-tex")
@@ -108,18 +129,9 @@ def convert(
         logger.debug("Verbose mode enabled")
 
     try:
-        # Initialize converter
-        converter = ImageToLaTeXConverter()
-
-        # Map CLI type to ContentType enum
-        content_type_map = {
-            "equation": ContentType.EQUATION,
-            "table": ContentType.TABLE,
-            "diagram": ContentType.DIAGRAM,
-            "document": ContentType.DOCUMENT,
-            "auto": None,
-        }
-        content_type = content_type_map[type]
+        converter = _get_converter()
+
+        content_type = _CONTENT_TYPE_MAP[type]
 
         # Convert based on type
         if type == "equation":
@@ -133,6 +145,8 @@ def convert(
         else:
             # Auto-detect
             result = converter.convert(image_path, content_type=content_type)
+            if result.validation_error == "model_refusal":
+                raise ConversionError("Vision model returned no LaTeX")
             latex_code = result.latex_code
 
             if verbose:
@@ -164,6 +178,190 @@ def convert(
         sys.exit(1)
 
 
+def _find_images(path: str) -> list[Path]:
+    """Resolve a directory or glob pattern to a sorted list of image files."""
+    if Path(path).is_dir():
+        candidates = Path(path).iterdir()
+    else:
+        candidates = (Path(match) for match in glob.glob(path))
+
+    return sorted(
+        candidate for candidate in candidates
+        if candidate.is_file() and candidate.suffix.lower() in ImageHandler.SUPPORTED_SUFFIXES
+    )
+
+
+def _output_paths(image_paths: list[Path], output_dir: Optional[str]) -> dict[Path, Path]:
+    """
+    Choose the .tex file for each image in a batch.
+
+    Images are written to <stem>.tex. Images that would share an output file
+    (a.png next to a.jpg) keep their suffix instead: a.png.tex, a.jpg.tex.
+
+    Raises:
+        click.ClickException: If two images still map to the same file
+    """
+    def output_path(image_path: Path, name: str) -> Path:
+        return Path(output_dir) / name if output_dir else image_path.parent / name
+
+    by_stem = defaultdict(list)
+    for image_path in image_paths:
+        by_stem[output_path(image_path, f"{image_path.stem}.tex")].append(image_path)
+
+    outputs = {}
+    for path, images in by_stem.items():
+        for image_path in images:
+            outputs[image_path] = (
+                path if len(images) == 1 else output_path(image_path, f"{image_path.name}.tex")
+            )
+
+    by_output = defaultdict(list)
+    for image_path, path in outputs.items():
+        by_output[path].append(image_path)
+    for path, images in by_output.items():
+        if len(images) > 1:
+            raise click.ClickException(
+                f"Images would overwrite the same output file {path}: "
+                f"{', '.join(map(str, images))}"
+            )
+
+    return outputs
+
+
+def _convert_to_latex(
+    converter: ImageToLaTeXConverter, image_path: Path, type: str
+) -> tuple[str, Optional[str]]:
+    """
+    Convert one image using the converter method for the given content type.
+
+    Returns:
+        The LaTeX code, and its validation error or None if it is valid
+
+    Raises:
+        ConversionError: If conversion fails or the model returned no LaTeX
+    """
+    if type == "equation":
+        latex_code = converter.convert_equation(image_path)
+    elif type == "table":
+        latex_code = converter.convert_table(image_path)
+    elif type == "document":
+        latex_code = converter.convert_to_document(image_path)
+    else:
+        result = converter.convert(image_path, content_type=_CONTENT_TYPE_MAP[type])
+        if result.validation_error == "model_refusal":
+            raise ConversionError("Vision model returned no LaTeX")
+        return result.latex_code, result.validation_error
+
+    if not converter.validate_output:
+        return latex_code, None
+    return latex_code, LaTeXFormatter.validate_latex(latex_code)[1]
+
+
+@cli.command()
+@click.argument("path", type=str)
+@click.option(
+    "-o", "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Directory for .tex files (default: next to each image)",
+)
+@click.option(
+    "-t", "--type",
+    type=click.Choice(["equation", "table", "diagram", "document", "auto"], case_sensitive=False),
+    default="auto",
+    help="Type of content to convert (default: auto-detect)",
+)
+@click.option(
+    "-c", "--concurrency",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Number of images converted in parallel",
+)
+@click.option(
+    "-v", "--verbose",
+    is_flag=True,
+    help="Enable verbose output",
+)
+def batch(
+    path: str,
+    output_dir: Optional[str],
+    type: str,
+    concurrency: int,
+    verbose: bool,
+):
+    """
+    Convert every image in a directory or matching a glob pattern.
+
+    Each image is written to a .tex file with the same name (keeping the
+    image suffix when two images share a name, e.g. a.png.tex). Vision API
+    calls run in parallel, so large batches finish in a fraction of the
+    time of converting images one by one.
+
+    Example usage:
+
+    \b
+    # Convert all images in a directory
+    image-to-tex batch scans/
+
+    \b
+    # Convert matching images into a separate directory
+    image-to-tex batch "scans/eq*.png" --type equation -o out/
+    """
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+        logger.debug("Verbose mode enabled")
+
+    image_paths = _find_images(path)
+    if not image_paths:
+        click.echo(f"No images found: {path}", err=True)
+        sys.exit(1)
+
+    output_paths = _output_paths(image_paths, output_dir)
+
+    try:
+        converter = _get_converter()
+    except NoAPIKeyError as e:
+        click.echo(f"Error: {e}", err=True)
+        click.echo("\nPlease set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variable.", err=True)
+        click.echo("See .env.example for configuration options.", err=True)
+        sys.exit(1)
+
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(_convert_to_latex, converter, image_path, type): image_path
+            for image_path in image_paths
+        }
+
+        for future in as_completed(futures):
+            image_path = futures[future]
+            try:
+                latex_code, validation_error = future.result()
+            except Exception as e:
+                failures += 1
+                click.echo(f"✗ {image_path}: {e}", err=True)
+                continue
+
+            # Invalid LaTeX is still written for hand-fixing, but counts as a failure
+            output_path = output_paths[image_path]
+            output_path.write_text(latex_code)
+            if validation_error:
+                failures += 1
+                click.echo(f"✗ {image_path} -> {output_path}: {validation_error}", err=True)
+            else:
+                click.echo(f"✓ {image_path} -> {output_path}", err=True)
+
+    click.echo(
+        f"Converted {len(image_paths) - failures}/{len(image_paths)} images",
+        err=True,
+    )
+    if failures:
+        sys.exit(1)
+
+
 @cli.command()
 @click.argument("image_path", type=click.Path(exists=True))
 def info(image_path: str):
@@ -1,9 +1,14 @@
 """Main converter engine for image-to-LaTeX conversion."""
 
+import functools
 import logging
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Union
 
+from ..utils.cache import ConversionCache
 from ..utils.image_handler import ImageHandler, ImageHandlerError
 from ..utils.latex_formatter import ContentType, LaTeXFormatter
 from .vision_client import VisionClient, VisionClientError
@@ -11,6 +16,18 @@ from .vision_client import VisionClient, VisionClientError
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
+def _vision_semaphore() -> threading.BoundedSemaphore:
+    """
+    Return the limit on vision model calls in flight in this process.
+
+    Shared by all converters so a batch fan-out saturates the provider rate
+    limit instead of tripping it. Created on first use so a .env file loaded
+    after import is honoured.
+    """
+    return threading.BoundedSemaphore(int(os.getenv("IMAGE_TO_TEX_MAX_CONCURRENCY", "10")))
+
+
 class ConversionError(Exception):
     """Base exception for conversion errors."""
     pass
@@ -55,6 +72,17 @@ class ConverterResult:
             "validation_error": self.validation_error,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConverterResult":
+        """Create a result from a dictionary produced by to_dict()."""
+        return cls(
+            latex_code=data["latex_code"],
+            content_type=ContentType(data["content_type"]),
+            raw_response=data.get("raw_response", ""),
+            is_valid=data["is_valid"],
+            validation_error=data.get("validation_error"),
+        )
+
 
 class ImageToLaTeXConverter:
     """
@@ -121,10 +149,27 @@ Instructions:
 
 Provide clean, compilable LaTeX code."""
 
+    # Longest image edge sent to the vision model (Claude's recommended limit)
+    MAX_IMAGE_DIMENSION = 1568
+
+    # Vision detail level per content type; content types not listed use the
+    # provider default. Only OpenAI models support a detail setting.
+    DETAIL_LEVELS = {
+        ContentType.EQUATION: "low",
+        ContentType.TABLE: "low",
+        ContentType.DIAGRAM: "high",
+        ContentType.DOCUMENT: "high",
+    }
+
+    # Responses starting with these (lowercased) are refusals, not LaTeX
+    REFUSAL_PREFIXES = ("i'm sorry", "i am sorry", "i cannot", "i can't")
+
     def __init__(
         self,
         vision_client: Optional[VisionClient] = None,
         validate_output: bool = True,
+        response_cache_size: int = 128,
+        max_dimension: Optional[int] = MAX_IMAGE_DIMENSION,
     ):
         """
         Initialize the converter.
@@ -132,24 +177,55 @@ Provide clean, compilable LaTeX code."""
         Args:
             vision_client: VisionClient instance (creates default if not provided)
             validate_output: Whether to validate LaTeX output
+            response_cache_size: Number of vision model responses to keep in
+                memory, keyed by image content and prompt (0 to disable)
+            max_dimension: Downscale images so neither side exceeds this many
+                pixels before sending them to the vision model (None to send
+                images as-is)
         """
         self.vision_client = vision_client or VisionClient()
         self.validate_output = validate_output
+        self.max_dimension = max_dimension
         self.image_handler = ImageHandler()
+        self.response_cache_size = response_cache_size
+        self._response_cache: OrderedDict[str, str] = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        self._vision_semaphore = _vision_semaphore()
+
+    def _get_cached_response(self, key: str) -> Optional[str]:
+        """Return a cached vision model response, marking it recently used."""
+        with self._response_cache_lock:
+            raw_response = self._response_cache.get(key)
+            if raw_response is not None:
+                self._response_cache.move_to_end(key)
+            return raw_response
+
+    def _cache_response(self, key: str, raw_response: str) -> None:
+        """Store a vision model response, evicting the least recently used."""
+        with self._response_cache_lock:
+            self._response_cache[key] = raw_response
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self.response_cache_size:
+                self._response_cache.popitem(last=False)
 
     def convert(
         self,
-        image_path: Union[str, Path],
+        image_path: Union[str, Path, bytes],
         content_type: Optional[ContentType] = None,
         auto_detect: bool = True,
+        detail: Optional[str] = None,
     ) -> ConverterResult:
         """
         Convert an image to LaTeX code.
 
         Args:
-            image_path: Path to the image file
-            content_type: Type of content (if known), or None to auto-detect
+            image_path: Path to the image file, or the raw image bytes
+            content_type: Type of content (if known), or None to guess it from
+                the image size and auto-detect (UNKNOWN always uses the general
+                prompt)
             auto_detect: Whether to auto-detect content type from response
+            detail: Vision detail level ("low" or "high"), or None to pick
+                one from DETAIL_LEVELS
 
         Returns:
             ConverterResult with LaTeX code and metadata
@@ -157,7 +233,8 @@ Provide clean, compilable LaTeX code."""
         Raises:
             ConversionError: If conversion fails
         """
-        image_path = Path(image_path)
+        if not isinstance(image_path, (bytes, Path)):
+            image_path = Path(image_path)
 
         # Validate image
         try:
@@ -165,6 +242,15 @@ Provide clean, compilable LaTeX code."""
         except ImageHandlerError as e:
             raise ConversionError(f"Image validation failed: {e}") from e
 
+        # Pick a specific prompt from the image shape when none was given
+        if content_type is None:
+            try:
+                content_type = self.image_handler.guess_content_type(image_path)
+            except ImageHandlerError as e:
+                raise ConversionError(f"Image validation failed: {e}") from e
+            if content_type is not None:
+                logger.info(f"Guessed content type from image size: {content_type}")
+
         # Select prompt based on content type
         if content_type and content_type != ContentType.UNKNOWN:
             prompt = self.PROMPTS.get(content_type, self.GENERAL_PROMPT)
@@ -173,12 +259,36 @@ Provide clean, compilable LaTeX code."""
             prompt = self.GENERAL_PROMPT
             logger.info("Using general prompt for content detection")
 
-        # Call vision model
-        try:
-            raw_response = self.vision_client.analyze_image(image_path, prompt)
-            logger.info(f"Received response from vision model ({len(raw_response)} chars)")
-        except VisionClientError as e:
-            raise ConversionError(f"Vision model failed: {e}") from e
+        if detail is None:
+            detail = self.DETAIL_LEVELS.get(content_type)
+
+        # Reuse the response for an identical image and prompt
+        cache_key = None
+        raw_response = None
+        if self.response_cache_size > 0:
+            cache_key = ConversionCache.make_key(image_path, prompt=prompt, detail=detail)
+            raw_response = self._get_cached_response(cache_key)
+
+        if raw_response is not None:
+            logger.info("Using cached vision model response")
+        else:
+            raw_response = self._analyze(image_path, prompt, detail)
+
+            # Skip formatting when there is no LaTeX to extract; refusals are
+            # not cached so a retry asks the model again
+            stripped = raw_response.strip()
+            if not stripped or stripped.lower().startswith(self.REFUSAL_PREFIXES):
+                logger.warning("Vision model returned no LaTeX")
+                return ConverterResult(
+                    latex_code="",
+                    content_type=ContentType.UNKNOWN,
+                    raw_response=raw_response,
+                    is_valid=False,
+                    validation_error="model_refusal",
+                )
+
+            if cache_key is not None:
+                self._cache_response(cache_key, raw_response)
 
         # Extract LaTeX code
         latex_code = LaTeXFormatter.extract_latex_code(raw_response)
@@ -206,56 +316,122 @@ Provide clean, compilable LaTeX code."""
             validation_error=validation_error,
         )
 
-    def convert_equation(self, image_path: Union[str, Path], inline: bool = False) -> str:
+    def _analyze(
+        self, image_path: Union[Path, bytes], prompt: str, detail: Optional[str]
+    ) -> str:
+        """
+        Send an image to the vision model, downscaling it first if needed.
+
+        Raises:
+            ConversionError: If preprocessing or the vision model fails
+        """
+        send_path = image_path
+        try:
+            # Resized copies are cached by ImageHandler, so they are not deleted
+            if self.max_dimension is not None:
+                send_path = self.image_handler.preprocess_image(
+                    image_path, max_dimension=self.max_dimension
+                )
+
+            with self._vision_semaphore:
+                raw_response = self.vision_client.analyze_image(
+                    send_path, prompt, detail=detail
+                )
+            logger.info(f"Received response from vision model ({len(raw_response)} chars)")
+            return raw_response
+        except VisionClientError as e:
+            raise ConversionError(f"Vision model failed: {e}") from e
+        except ImageHandlerError as e:
+            raise ConversionError(f"Image validation failed: {e}") from e
+        except OSError as e:
+            raise ConversionError(f"Image preprocessing failed: {e}") from e
+
+    def _convert_latex(
+        self,
+        image_path: Union[str, Path, bytes],
+        content_type: ContentType,
+        detail: Optional[str],
+    ) -> ConverterResult:
+        """
+        Convert an image of a known content type, rejecting refusals.
+
+        Raises:
+            ConversionError: If conversion fails or the model returned no LaTeX
+        """
+        result = self.convert(image_path, content_type=content_type, detail=detail)
+        if result.validation_error == "model_refusal":
+            raise ConversionError("Vision model returned no LaTeX")
+        return result
+
+    def convert_equation(
+        self,
+        image_path: Union[str, Path, bytes],
+        inline: bool = False,
+        detail: Optional[str] = None,
+    ) -> str:
         """
         Convert an image containing equations to LaTeX.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
             inline: Whether to format as inline math
+            detail: Vision detail level, or None for the equation default
 
         Returns:
             Formatted LaTeX equation code
+
+        Raises:
+            ConversionError: If conversion fails or the model returned no LaTeX
         """
-        result = self.convert(image_path, content_type=ContentType.EQUATION)
+        result = self._convert_latex(image_path, ContentType.EQUATION, detail)
         return LaTeXFormatter.wrap_equation(result.latex_code, inline=inline)
 
     def convert_table(
         self,
-        image_path: Union[str, Path],
+        image_path: Union[str, Path, bytes],
         caption: Optional[str] = None,
+        detail: Optional[str] = None,
     ) -> str:
         """
         Convert an image containing a table to LaTeX.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
             caption: Optional table caption
+            detail: Vision detail level, or None for the table default
 
         Returns:
             Formatted LaTeX table code
+
+        Raises:
+            ConversionError: If conversion fails or the model returned no LaTeX
         """
-        result = self.convert(image_path, content_type=ContentType.TABLE)
+        result = self._convert_latex(image_path, ContentType.TABLE, detail)
         return LaTeXFormatter.wrap_table(result.latex_code, caption=caption)
 
     def convert_to_document(
         self,
-        image_path: Union[str, Path],
+        image_path: Union[str, Path, bytes],
         title: Optional[str] = None,
         author: Optional[str] = None,
+        detail: Optional[str] = None,
     ) -> str:
         """
         Convert an image to a complete LaTeX document.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
             title: Optional document title
             author: Optional document author
+            detail: Vision detail level, or None for the document default
 
         Returns:
             Complete LaTeX document
+
+        Raises:
+            ConversionError: If conversion fails or the model returned no LaTeX
         """
-        result = self.convert(image_path, content_type=ContentType.DOCUMENT)
+        result = self._convert_latex(image_path, ContentType.DOCUMENT, detail)
         return LaTeXFormatter.create_full_document(
             result.latex_code,
             title=title,
@@ -1,18 +1,58 @@
 """Vision AI client with support for Claude and GPT-4 Vision."""
 
-import base64
+import asyncio
 import logging
+import mmap
 import os
 from enum import Enum
 from pathlib import Path
 from typing import Optional, Union
 
-from anthropic import Anthropic
-from openai import OpenAI
-from PIL import Image
+from ..utils.image_handler import ImageHandler
+
+try:
+    # SIMD base64 encoder, several times faster on multi-megabyte images
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
 
 logger = logging.getLogger(__name__)
 
+MEDIA_TYPES = {
+    "jpeg": "image/jpeg",
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+
+def _detect_media_type(header: bytes) -> str:
+    """Detect the media type of an image from its first bytes."""
+    image_format = ImageHandler.sniff_format(header) or "png"
+    return MEDIA_TYPES.get(image_format.lower(), "image/png")
+
+
+def _encode_bytes(raw: bytes) -> tuple[str, str]:
+    """Base64-encode image bytes and detect their media type."""
+    return b64encode(raw).decode("ascii"), _detect_media_type(raw[:16])
+
+
+def _encode_file(path: str, size: int) -> tuple[str, str]:
+    """
+    Encode an image file.
+
+    The result is not cached: a base64 payload is a third larger than the
+    image, and analyze_image() already shares one encoding between the
+    primary and fallback models.
+    """
+    if size == 0:
+        raise OSError(f"Image file is empty: {path}")
+
+    # Encode from a memory map so the file is never copied into a bytes object
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return b64encode(mm).decode("ascii"), _detect_media_type(mm[:16])
+
 
 class ModelProvider(str, Enum):
     """Supported vision model providers."""
@@ -48,6 +88,7 @@ class VisionClient:
         openai_api_key: Optional[str] = None,
         claude_model: str = "claude-sonnet-4-5-20250929",
         openai_model: str = "gpt-4-vision-preview",
+        max_retries: int = 3,
     ):
         """
         Initialize the vision client.
@@ -59,6 +100,9 @@ class VisionClient:
             openai_api_key: OpenAI API key (or use OPENAI_API_KEY env var)
             claude_model: Specific Claude model version
             openai_model: Specific OpenAI model version
+            max_retries: Retries per model call on rate limits, server errors
+                and connection errors, with jittered exponential backoff,
+                before falling back to the other model
         """
         # Get API keys from environment if not provided
         self.anthropic_api_key = anthropic_api_key or os.getenv("ANTHROPIC_API_KEY")
@@ -77,16 +121,31 @@ class VisionClient:
 
         self.claude_model = os.getenv("CLAUDE_MODEL", claude_model)
         self.openai_model = os.getenv("OPENAI_MODEL", openai_model)
+        self.max_retries = max_retries
 
         # Initialize clients
         self.anthropic_client = None
         self.openai_client = None
 
+        # Async clients are built on the first analyze_image_async() call,
+        # since most callers only ever use the sync ones
+        self._async_anthropic_client = None
+        self._async_openai_client = None
+
+        # The SDK clients retry transient failures themselves. The SDKs are
+        # imported here because importing them takes over a second, which
+        # callers that never reach a model should not pay.
         if self.anthropic_api_key:
-            self.anthropic_client = Anthropic(api_key=self.anthropic_api_key)
+            from anthropic import Anthropic
+
+            self.anthropic_client = Anthropic(
+                api_key=self.anthropic_api_key, max_retries=max_retries
+            )
 
         if self.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            from openai import OpenAI
+
+            self.openai_client = OpenAI(api_key=self.openai_api_key, max_retries=max_retries)
 
         # Validate at least one API key is available
         if not self.anthropic_client and not self.openai_client:
@@ -95,47 +154,78 @@ class VisionClient:
                 "environment variable, or pass keys to the constructor."
             )
 
-    def _encode_image(self, image_path: Union[str, Path]) -> tuple[str, str]:
+        # Skip models without a client up front, so that a call never starts
+        # with an attempt that can only fail
+        configured = {
+            ModelProvider.CLAUDE: self.anthropic_client is not None,
+            ModelProvider.OPENAI: self.openai_client is not None,
+        }
+        if not configured.get(self.primary_model) and configured.get(self.fallback_model):
+            logger.info(
+                f"Primary model ({self.primary_model}) not configured, "
+                f"using {self.fallback_model}"
+            )
+            self.primary_model, self.fallback_model = self.fallback_model, ModelProvider.NONE
+        if self.fallback_model == self.primary_model or not configured.get(self.fallback_model):
+            self.fallback_model = ModelProvider.NONE
+
+    @property
+    def async_anthropic_client(self):
+        """Async Anthropic client, created on first use; None without an API key."""
+        if self._async_anthropic_client is None and self.anthropic_api_key:
+            from anthropic import AsyncAnthropic
+
+            self._async_anthropic_client = AsyncAnthropic(
+                api_key=self.anthropic_api_key, max_retries=self.max_retries
+            )
+        return self._async_anthropic_client
+
+    @property
+    def async_openai_client(self):
+        """Async OpenAI client, created on first use; None without an API key."""
+        if self._async_openai_client is None and self.openai_api_key:
+            from openai import AsyncOpenAI
+
+            self._async_openai_client = AsyncOpenAI(
+                api_key=self.openai_api_key, max_retries=self.max_retries
+            )
+        return self._async_openai_client
+
+    def _encode_image(self, image_path: Union[str, Path, bytes]) -> tuple[str, str]:
         """
         Encode image to base64 and detect media type.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
 
         Returns:
             Tuple of (base64_encoded_data, media_type)
         """
+        if isinstance(image_path, bytes):
+            return _encode_bytes(image_path)
+
         image_path = Path(image_path)
 
-        if not image_path.exists():
+        try:
+            stat = image_path.stat()
+        except FileNotFoundError:
             raise FileNotFoundError(f"Image file not found: {image_path}")
 
-        # Detect media type
-        img = Image.open(image_path)
-        format_lower = img.format.lower() if img.format else "png"
-
-        media_type_map = {
-            "jpeg": "image/jpeg",
-            "jpg": "image/jpeg",
-            "png": "image/png",
-            "gif": "image/gif",
-            "webp": "image/webp",
-        }
-        media_type = media_type_map.get(format_lower, "image/png")
-
-        # Read and encode
-        with open(image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
-
-        return image_data, media_type
+        return _encode_file(str(image_path), stat.st_size)
 
-    def _call_claude(self, prompt: str, image_path: Union[str, Path]) -> str:
+    def _call_claude(
+        self,
+        prompt: str,
+        image_path: Union[str, Path, bytes],
+        encoded: Optional[tuple[str, str]] = None,
+    ) -> str:
         """
         Call Claude vision API.
 
         Args:
             prompt: Text prompt for the vision model
-            image_path: Path to the image
+            image_path: Path to the image, or the raw image bytes
+            encoded: Result of _encode_image() for image_path, if already known
 
         Returns:
             Model response text
@@ -143,14 +233,22 @@ class VisionClient:
         if not self.anthropic_client:
             raise NoAPIKeyError("Anthropic API key not configured")
 
-        image_data, media_type = self._encode_image(image_path)
+        image_data, media_type = encoded or self._encode_image(image_path)
 
         logger.info(f"Calling Claude model: {self.claude_model}")
 
         message = self.anthropic_client.messages.create(
-            model=self.claude_model,
-            max_tokens=4096,
-            messages=[
+            **self._claude_request(prompt, image_data, media_type)
+        )
+
+        return message.content[0].text
+
+    def _claude_request(self, prompt: str, image_data: str, media_type: str) -> dict:
+        """Build the Claude messages.create() arguments for an image."""
+        return {
+            "model": self.claude_model,
+            "max_tokens": 4096,
+            "messages": [
                 {
                     "role": "user",
                     "content": [
@@ -169,17 +267,24 @@ class VisionClient:
                     ],
                 }
             ],
-        )
-
-        return message.content[0].text
+        }
 
-    def _call_openai(self, prompt: str, image_path: Union[str, Path]) -> str:
+    def _call_openai(
+        self,
+        prompt: str,
+        image_path: Union[str, Path, bytes],
+        detail: Optional[str] = None,
+        encoded: Optional[tuple[str, str]] = None,
+    ) -> str:
         """
         Call OpenAI GPT-4 Vision API.
 
         Args:
             prompt: Text prompt for the vision model
-            image_path: Path to the image
+            image_path: Path to the image, or the raw image bytes
+            detail: Image detail level ("low" or "high"), or None for the
+                API default
+            encoded: Result of _encode_image() for image_path, if already known
 
         Returns:
             Model response text
@@ -187,13 +292,31 @@ class VisionClient:
         if not self.openai_client:
             raise NoAPIKeyError("OpenAI API key not configured")
 
-        image_data, media_type = self._encode_image(image_path)
+        image_data, media_type = encoded or self._encode_image(image_path)
 
         logger.info(f"Calling OpenAI model: {self.openai_model}")
 
         response = self.openai_client.chat.completions.create(
-            model=self.openai_model,
-            messages=[
+            **self._openai_request(prompt, image_data, media_type, detail)
+        )
+
+        return response.choices[0].message.content
+
+    def _openai_request(
+        self,
+        prompt: str,
+        image_data: str,
+        media_type: str,
+        detail: Optional[str] = None,
+    ) -> dict:
+        """Build the OpenAI chat.completions.create() arguments for an image."""
+        image_url = {"url": f"data:{media_type};base64,{image_data}"}
+        if detail is not None:
+            image_url["detail"] = detail
+
+        return {
+            "model": self.openai_model,
+            "messages": [
                 {
                     "role": "user",
                     "content": [
@@ -203,31 +326,109 @@ class VisionClient:
                         },
                         {
                             "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{media_type};base64,{image_data}"
-                            },
+                            "image_url": image_url,
                         },
                     ],
                 }
             ],
-            max_tokens=4096,
+            "max_tokens": 4096,
+        }
+
+    async def _call_claude_async(self, prompt: str, encoded: tuple[str, str]) -> str:
+        """
+        Call Claude vision API without blocking the event loop.
+
+        Args:
+            prompt: Text prompt for the vision model
+            encoded: Result of _encode_image() for the image
+
+        Returns:
+            Model response text
+        """
+        if not self.async_anthropic_client:
+            raise NoAPIKeyError("Anthropic API key not configured")
+
+        logger.info(f"Calling Claude model: {self.claude_model}")
+
+        message = await self.async_anthropic_client.messages.create(
+            **self._claude_request(prompt, *encoded)
+        )
+
+        return message.content[0].text
+
+    async def _call_openai_async(
+        self,
+        prompt: str,
+        encoded: tuple[str, str],
+        detail: Optional[str] = None,
+    ) -> str:
+        """
+        Call OpenAI GPT-4 Vision API without blocking the event loop.
+
+        Args:
+            prompt: Text prompt for the vision model
+            encoded: Result of _encode_image() for the image
+            detail: Image detail level ("low" or "high"), or None for the
+                API default
+
+        Returns:
+            Model response text
+        """
+        if not self.async_openai_client:
+            raise NoAPIKeyError("OpenAI API key not configured")
+
+        logger.info(f"Calling OpenAI model: {self.openai_model}")
+
+        response = await self.async_openai_client.chat.completions.create(
+            **self._openai_request(prompt, *encoded, detail)
         )
 
         return response.choices[0].message.content
 
+    def _model_chain(self, use_fallback: bool) -> list[ModelProvider]:
+        """Return the models to try for one call, primary first."""
+        models = [self.primary_model]
+        if use_fallback and self.fallback_model != ModelProvider.NONE:
+            models.append(self.fallback_model)
+        return [model for model in models if model != ModelProvider.NONE]
+
+    def _model_failed(self, models: list[ModelProvider], attempt: int, error: Exception) -> None:
+        """
+        Log a failed model call, moving on to the next model in the chain.
+
+        Raises:
+            VisionClientError: If no model is left to try
+        """
+        model = models[attempt]
+        if attempt == 0:
+            logger.warning(f"Primary model ({model}) failed: {error}")
+            if len(models) == 1:
+                raise VisionClientError(
+                    f"Primary model failed and no fallback configured: {error}"
+                ) from error
+            logger.info(f"Attempting fallback model: {models[attempt + 1]}")
+        else:
+            logger.error(f"Fallback model ({model}) failed: {error}")
+            raise VisionClientError(
+                f"Both primary and fallback models failed. Last error: {error}"
+            ) from error
+
     def analyze_image(
         self,
-        image_path: Union[str, Path],
+        image_path: Union[str, Path, bytes],
         prompt: str,
         use_fallback: bool = True,
+        detail: Optional[str] = None,
     ) -> str:
         """
         Analyze an image using vision AI with automatic fallback.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
             prompt: Text prompt describing what to extract/analyze
             use_fallback: Whether to try fallback model if primary fails
+            detail: Image detail level ("low" or "high") for models that
+                support it (OpenAI); ignored by Claude
 
         Returns:
             Model response text
@@ -235,33 +436,62 @@ class VisionClient:
         Raises:
             VisionClientError: If all attempts fail
         """
-        # Try primary model
+        # Encode once so the fallback model reuses the same payload
         try:
-            if self.primary_model == ModelProvider.CLAUDE:
-                return self._call_claude(prompt, image_path)
-            elif self.primary_model == ModelProvider.OPENAI:
-                return self._call_openai(prompt, image_path)
+            encoded = self._encode_image(image_path)
         except Exception as e:
-            logger.warning(f"Primary model ({self.primary_model}) failed: {e}")
-
-            if not use_fallback or self.fallback_model == ModelProvider.NONE:
-                raise VisionClientError(
-                    f"Primary model failed and no fallback configured: {e}"
-                ) from e
+            raise VisionClientError(f"Failed to encode image: {e}") from e
 
-        # Try fallback model
-        if use_fallback and self.fallback_model != ModelProvider.NONE:
+        models = self._model_chain(use_fallback)
+        for attempt, model in enumerate(models):
             try:
-                logger.info(f"Attempting fallback model: {self.fallback_model}")
+                if model == ModelProvider.CLAUDE:
+                    return self._call_claude(prompt, image_path, encoded=encoded)
+                return self._call_openai(prompt, image_path, detail=detail, encoded=encoded)
+            except Exception as e:
+                self._model_failed(models, attempt, e)
+
+        raise VisionClientError("No models available or all attempts failed")
+
+    async def analyze_image_async(
+        self,
+        image_path: Union[str, Path, bytes],
+        prompt: str,
+        use_fallback: bool = True,
+        detail: Optional[str] = None,
+    ) -> str:
+        """
+        Analyze an image like analyze_image(), without blocking the event loop.
+
+        Lets one worker convert many images concurrently, for example with
+        asyncio.gather().
 
-                if self.fallback_model == ModelProvider.CLAUDE:
-                    return self._call_claude(prompt, image_path)
-                elif self.fallback_model == ModelProvider.OPENAI:
-                    return self._call_openai(prompt, image_path)
+        Args:
+            image_path: Path to the image file, or the raw image bytes
+            prompt: Text prompt describing what to extract/analyze
+            use_fallback: Whether to try fallback model if primary fails
+            detail: Image detail level ("low" or "high") for models that
+                support it (OpenAI); ignored by Claude
+
+        Returns:
+            Model response text
+
+        Raises:
+            VisionClientError: If all attempts fail
+        """
+        # Reading and encoding a large image is too slow for the event loop
+        try:
+            encoded = await asyncio.to_thread(self._encode_image, image_path)
+        except Exception as e:
+            raise VisionClientError(f"Failed to encode image: {e}") from e
+
+        models = self._model_chain(use_fallback)
+        for attempt, model in enumerate(models):
+            try:
+                if model == ModelProvider.CLAUDE:
+                    return await self._call_claude_async(prompt, encoded)
+                return await self._call_openai_async(prompt, encoded, detail=detail)
             except Exception as e:
-                logger.error(f"Fallback model ({self.fallback_model}) failed: {e}")
-                raise VisionClientError(
-                    f"Both primary and fallback models failed. Last error: {e}"
-                ) from e
+                self._model_failed(models, attempt, e)
 
         raise VisionClientError("No models available or all attempts failed")
@@ -0,0 +1,95 @@
+"""On-disk cache of conversion results keyed by image content."""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionCache:
+    """
+    Content-addressed cache of conversion results.
+
+    Entries are JSON files named by a SHA-256 digest of the image bytes and
+    the conversion options, so a renamed or copied image still hits while
+    an edited one misses.
+    """
+
+    DEFAULT_DIR = Path("~/.cache/image-to-tex")
+    CHUNK_SIZE = 1024 * 1024  # Bytes hashed per read
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for cache entries (or use
+                IMAGE_TO_TEX_CACHE_DIR env var, default ~/.cache/image-to-tex)
+        """
+        cache_dir = cache_dir or os.getenv("IMAGE_TO_TEX_CACHE_DIR") or self.DEFAULT_DIR
+        self.cache_dir = Path(cache_dir).expanduser()
+
+    @classmethod
+    def make_key(cls, image_path: Union[str, Path, bytes], **options) -> str:
+        """
+        Build a cache key from image content and conversion options.
+
+        Args:
+            image_path: Path to the image file, or the raw image bytes
+            **options: Conversion options that affect the result
+
+        Returns:
+            Hex digest identifying the entry
+        """
+        digest = hashlib.sha256()
+        if isinstance(image_path, bytes):
+            digest.update(image_path)
+        else:
+            with open(image_path, "rb") as f:
+                for chunk in iter(lambda: f.read(cls.CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            The cached value, or None on a miss or unreadable entry
+        """
+        try:
+            return json.loads(self._entry_path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        """
+        Store a result in the cache.
+
+        Args:
+            key: Cache key from make_key()
+            value: JSON-serializable result
+        """
+        entry_path = self._entry_path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial entry
+            temp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(value))
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
@@ -1,14 +1,91 @@
 """Image handling and preprocessing utilities."""
 
+import functools
+import hashlib
+import io
 import logging
+import os
+import stat
+import threading
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
-from PIL import Image
+from .latex_formatter import ContentType
 
 logger = logging.getLogger(__name__)
 
 
+def _read_image_meta(source, file_size: int) -> dict:
+    """Read image metadata from the image header."""
+    # PIL is imported on first use to keep "import image_to_tex" fast
+    from PIL import Image
+
+    with Image.open(source) as img:
+        return {
+            "format": img.format,
+            "mode": img.mode,
+            "size": img.size,
+            "width": img.size[0],
+            "height": img.size[1],
+            "file_size_mb": file_size / (1024 * 1024),
+        }
+
+
+@functools.lru_cache(maxsize=64)
+def _image_meta(path: str, mtime_ns: int, size: int) -> dict:
+    """
+    Read image file metadata, reusing it for an unchanged file.
+
+    The modification time and size are part of the cache key so an edited
+    file is read again. Callers must not mutate the returned dict.
+    """
+    return _read_image_meta(path, size)
+
+
+def _lookup_image_meta(
+    image_path: Union[Path, bytes], file_stat: Optional[os.stat_result] = None
+) -> dict:
+    """Return metadata for image bytes or a file, statting the file if needed."""
+    if isinstance(image_path, bytes):
+        return _read_image_meta(io.BytesIO(image_path), len(image_path))
+
+    file_stat = file_stat or image_path.stat()
+    return _image_meta(os.path.abspath(image_path), file_stat.st_mtime_ns, file_stat.st_size)
+
+
+def _open_cache_dir(cache_dir: Path) -> Path:
+    """
+    Create a private cache directory, or check an existing one is ours.
+
+    Raises:
+        OSError: If the directory cannot be created or belongs to another user
+    """
+    cache_dir = cache_dir.expanduser()
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if hasattr(os, "getuid") and cache_dir.stat().st_uid != os.getuid():
+        raise PermissionError(f"Cache directory owned by another user: {cache_dir}")
+    return cache_dir
+
+
+def _prune_cache_dir(cache_dir: Path, max_entries: int) -> None:
+    """Delete the least recently used files beyond max_entries."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".tmp"):
+            continue  # Still being written by another thread or process
+        try:
+            entries.append((entry.stat().st_mtime_ns, entry.path))
+        except FileNotFoundError:
+            continue
+
+    entries.sort()
+    for _, path in entries[:-max_entries]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
 class ImageHandlerError(Exception):
     """Base exception for image handler errors."""
     pass
@@ -17,16 +94,60 @@ class ImageHandlerError(Exception):
 class ImageHandler:
     """Handle image preprocessing and validation."""
 
-    SUPPORTED_FORMATS = {"PNG", "JPEG", "JPG", "GIF", "WEBP", "BMP", "TIFF"}
+    SUPPORTED_FORMATS = frozenset({"PNG", "JPEG", "JPG", "GIF", "WEBP", "BMP", "TIFF"})
+    SUPPORTED_SUFFIXES = frozenset(
+        {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+    )
     MAX_SIZE_MB = 20  # Maximum image size in MB
 
+    # Resized copies of images, reused while the source file is unchanged.
+    # Per user, so other users can neither read nor plant cached copies.
+    PREPROCESS_CACHE_DIR = Path("~/.cache/image-to-tex/resized")
+    PREPROCESS_CACHE_SIZE = 128  # Maximum number of cached copies
+
+    # Leading bytes of each supported format (WebP is checked separately)
+    MAGIC_NUMBERS = (
+        (b"\x89PNG\r\n\x1a\n", "PNG"),
+        (b"\xff\xd8\xff", "JPEG"),
+        (b"GIF87a", "GIF"),
+        (b"GIF89a", "GIF"),
+        (b"BM", "BMP"),
+        (b"II*\x00", "TIFF"),
+        (b"MM\x00*", "TIFF"),
+    )
+
+    @staticmethod
+    def sniff_format(header: bytes) -> Optional[str]:
+        """
+        Identify an image format from its first bytes.
+
+        Much cheaper than opening the image, so it suits a quick check of
+        untrusted uploads before any further work.
+
+        Args:
+            header: At least the first 12 bytes of the image
+
+        Returns:
+            Format name as reported by PIL, or None if not a supported format
+        """
+        for magic, image_format in ImageHandler.MAGIC_NUMBERS:
+            if header.startswith(magic):
+                return image_format
+
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return "WEBP"
+
+        return None
+
     @staticmethod
-    def validate_image(image_path: Union[str, Path]) -> bool:
+    def validate_image(image_path: Union[str, Path, bytes], fast: bool = True) -> bool:
         """
         Validate that an image file is readable and supported.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
+            fast: For files with a supported suffix, check the format from
+                the leading bytes instead of parsing the header with PIL
 
         Returns:
             True if valid
@@ -34,39 +155,65 @@ class ImageHandler:
         Raises:
             ImageHandlerError: If validation fails
         """
-        image_path = Path(image_path)
+        file_stat = None
+        if isinstance(image_path, bytes):
+            name = "<in-memory image>"
+            file_size = len(image_path)
+        else:
+            image_path = Path(image_path)
 
-        if not image_path.exists():
-            raise ImageHandlerError(f"Image file not found: {image_path}")
+            # A single stat covers the existence, file type and size checks
+            try:
+                file_stat = image_path.stat()
+            except FileNotFoundError:
+                raise ImageHandlerError(f"Image file not found: {image_path}")
 
-        if not image_path.is_file():
-            raise ImageHandlerError(f"Path is not a file: {image_path}")
+            if not stat.S_ISREG(file_stat.st_mode):
+                raise ImageHandlerError(f"Path is not a file: {image_path}")
+
+            name = image_path.name
+            file_size = file_stat.st_size
 
         # Check file size
-        file_size_mb = image_path.stat().st_size / (1024 * 1024)
+        file_size_mb = file_size / (1024 * 1024)
         if file_size_mb > ImageHandler.MAX_SIZE_MB:
             raise ImageHandlerError(
                 f"Image file too large: {file_size_mb:.2f}MB "
                 f"(max: {ImageHandler.MAX_SIZE_MB}MB)"
             )
 
+        trusted_suffix = (
+            file_stat is not None
+            and image_path.suffix.lower() in ImageHandler.SUPPORTED_SUFFIXES
+        )
+        if fast and trusted_suffix:
+            try:
+                with open(image_path, "rb") as f:
+                    image_format = ImageHandler.sniff_format(f.read(16))
+            except OSError as e:
+                raise ImageHandlerError(f"Failed to open image: {e}") from e
+
+            if image_format is None:
+                raise ImageHandlerError(f"Unsupported image format: {name}")
+            logger.info(f"Validated image: {name} ({image_format})")
+            return True
+
         # Try to open and validate format
         try:
-            with Image.open(image_path) as img:
-                if img.format not in ImageHandler.SUPPORTED_FORMATS:
-                    raise ImageHandlerError(
-                        f"Unsupported image format: {img.format}. "
-                        f"Supported: {', '.join(ImageHandler.SUPPORTED_FORMATS)}"
-                    )
-                logger.info(
-                    f"Validated image: {image_path.name} "
-                    f"({img.format}, {img.size[0]}x{img.size[1]})"
-                )
+            meta = _lookup_image_meta(image_path, file_stat)
         except Exception as e:
-            if isinstance(e, ImageHandlerError):
-                raise
             raise ImageHandlerError(f"Failed to open image: {e}") from e
 
+        if meta["format"] not in ImageHandler.SUPPORTED_FORMATS:
+            raise ImageHandlerError(
+                f"Unsupported image format: {meta['format']}. "
+                f"Supported: {', '.join(sorted(ImageHandler.SUPPORTED_FORMATS))}"
+            )
+        logger.info(
+            f"Validated image: {name} "
+            f"({meta['format']}, {meta['width']}x{meta['height']})"
+        )
+
         return True
 
     @staticmethod
@@ -82,56 +229,141 @@ class ImageHandler:
         """
         image_path = Path(image_path)
 
-        with Image.open(image_path) as img:
-            return {
-                "path": str(image_path),
-                "format": img.format,
-                "mode": img.mode,
-                "size": img.size,
-                "width": img.size[0],
-                "height": img.size[1],
-                "file_size_mb": image_path.stat().st_size / (1024 * 1024),
-            }
+        return {"path": str(image_path), **_lookup_image_meta(image_path)}
+
+    @staticmethod
+    def guess_content_type(image_path: Union[str, Path, bytes]) -> Optional[ContentType]:
+        """
+        Guess the content type of an image from its dimensions.
+
+        Only the image header is read, so this is cheap enough to run before
+        choosing a prompt.
+
+        Args:
+            image_path: Path to the image file, or the raw image bytes
+
+        Returns:
+            Guessed content type, or None if the dimensions are inconclusive
+
+        Raises:
+            ImageHandlerError: If the image header cannot be read
+        """
+        if not isinstance(image_path, bytes):
+            image_path = Path(image_path)
+
+        try:
+            width, height = _lookup_image_meta(image_path)["size"]
+        except Exception as e:
+            raise ImageHandlerError(f"Failed to open image: {e}") from e
+
+        aspect_ratio = width / height
+
+        # A wide, short crop is almost always a single equation
+        if aspect_ratio > 4 and height < 200:
+            return ContentType.EQUATION
+
+        # A large page-shaped image is a scanned or rendered document
+        if 0.3 <= aspect_ratio <= 1.5 and height > 800:
+            return ContentType.DOCUMENT
+
+        return None
 
     @staticmethod
     def preprocess_image(
-        image_path: Union[str, Path],
+        image_path: Union[str, Path, bytes],
         max_dimension: int = 2048,
-    ) -> Path:
+    ) -> Union[Path, bytes]:
         """
         Preprocess image for optimal API usage.
 
-        Resizes large images while maintaining aspect ratio.
+        Resizes large images while maintaining aspect ratio. Resized copies
+        of files are kept in PREPROCESS_CACHE_DIR and reused until the source
+        file changes; callers must not delete them. If the cache is unusable
+        the resized image is returned as bytes instead.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the raw image bytes
             max_dimension: Maximum width or height in pixels
 
         Returns:
-            Path to the preprocessed image (may be same as input)
+            Path to the preprocessed image (may be same as input), or the
+            preprocessed bytes when given bytes or when the cache is unusable
+
+        Raises:
+            ImageHandlerError: If the image header cannot be read
         """
-        image_path = Path(image_path)
+        if isinstance(image_path, bytes):
+            source = io.BytesIO(image_path)
+            file_stat = None
+        else:
+            image_path = Path(image_path)
+            source = image_path
+            file_stat = image_path.stat()
+
+        # Check if resizing is needed
+        try:
+            size = _lookup_image_meta(image_path, file_stat)["size"]
+        except Exception as e:
+            raise ImageHandlerError(f"Failed to open image: {e}") from e
+
+        if max(size) <= max_dimension:
+            logger.info("Image size acceptable, no preprocessing needed")
+            return image_path
+
+        output_path = None
+        if file_stat is not None:
+            cache_key = hashlib.sha256(
+                f"{os.path.abspath(image_path)}|{file_stat.st_mtime_ns}|"
+                f"{file_stat.st_size}|{max_dimension}".encode("utf-8")
+            ).hexdigest()
 
-        with Image.open(image_path) as img:
-            # Check if resizing is needed
-            if max(img.size) <= max_dimension:
-                logger.info("Image size acceptable, no preprocessing needed")
-                return image_path
+            # Reuse an earlier resize, marking it recently used. Any error is
+            # a cache miss: the cache only ever saves work.
+            try:
+                cache_dir = _open_cache_dir(ImageHandler.PREPROCESS_CACHE_DIR)
+                output_path = cache_dir / f"{cache_key}{image_path.suffix}"
+                os.utime(output_path)
+                logger.info(f"Using cached resized image: {output_path}")
+                return output_path
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Resize cache unavailable: {e}")
+                output_path = None
 
-            # Calculate new size maintaining aspect ratio
-            ratio = max_dimension / max(img.size)
-            new_size = tuple(int(dim * ratio) for dim in img.size)
+        from PIL import Image
+
+        with Image.open(source) as img:
+            image_format = img.format
+            original_size = img.size
+
+            # Resize in place maintaining aspect ratio. For reductions of 4x
+            # or more, thumbnail() decodes JPEGs at reduced scale and shrinks
+            # in a cheap box-filter step before the final LANCZOS pass.
+            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
 
             logger.info(
-                f"Resizing image from {img.size} to {new_size} "
+                f"Resized image from {original_size} to {img.size} "
                 f"(max_dimension={max_dimension})"
             )
 
-            # Resize
-            img_resized = img.resize(new_size, Image.Resampling.LANCZOS)
-
-            # Save to temporary file
-            output_path = image_path.parent / f"{image_path.stem}_processed{image_path.suffix}"
-            img_resized.save(output_path)
+            if output_path is not None:
+                # Write then rename so concurrent readers never see a partial file
+                temp_path = output_path.with_name(
+                    f"{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+                )
+                try:
+                    img.save(temp_path, format=image_format)
+                    os.replace(temp_path, output_path)
+                    _prune_cache_dir(output_path.parent, ImageHandler.PREPROCESS_CACHE_SIZE)
+                    return output_path
+                except OSError as e:
+                    logger.warning(f"Failed to cache resized image: {e}")
+                    try:
+                        temp_path.unlink()
+                    except OSError:
+                        pass
 
-            return output_path
+            output = io.BytesIO()
+            img.save(output, format=image_format)
+            return output.getvalue()
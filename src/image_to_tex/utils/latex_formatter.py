@@ -1,5 +1,6 @@
 """LaTeX formatting and validation utilities."""
 
+import functools
 import logging
 import re
 from enum import Enum
@@ -7,6 +8,28 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Markdown code fences stripped from model responses, with their language tag
+_CODE_FENCE_RE = re.compile(r"```(?:(?:latex|tex)?\n)?")
+# Explanatory phrases that mark a line as commentary before the LaTeX starts
+_EXPLANATION_RE = re.compile(
+    r"here is|here's|the latex|this is|i've converted|converted to"
+    r"|latex code:|explanation:|note:",
+    re.IGNORECASE,
+)
+# LaTeX markers of each content type, one named group per type
+_CONTENT_TYPE_RE = re.compile(
+    r"(?P<document>\\documentclass|\\maketitle)"
+    r"|(?P<table>\\begin\{table|\\begin\{tabular)"
+    r"|(?P<diagram>\\begin\{tikz|\\begin\{figure|\\includegraphics)"
+    r"|(?P<equation>\\begin\{equation|\\begin\{align|\\\[|\$|\\frac|\\int|\\sum|\\alpha)",
+    re.IGNORECASE,
+)
+# Marker precedence when several types appear, highest first
+_CONTENT_TYPE_PRIORITY = ("document", "table", "diagram", "equation")
+# Math delimiters removed before wrapping an equation: \[, \] and $ or $$
+_MATH_DELIMITER_RE = re.compile(r"\\[\[\]]|\$")
+_ENV_RE = re.compile(r"\\(begin|end)\{(\w+\*?)\}")
+
 
 class ContentType(str, Enum):
     """Types of scientific content that can be converted."""
@@ -29,6 +52,8 @@ class LaTeXFormatter:
         r"\usepackage{booktabs}",
         r"\usepackage{tikz}",
     ]
+    # Preamble lines as emitted by create_full_document, built once
+    _PACKAGES_BLOCK = "\n".join(DOCUMENT_PACKAGES) + "\n"
 
     @staticmethod
     def wrap_equation(latex_code: str, inline: bool = False) -> str:
@@ -43,10 +68,7 @@ class LaTeXFormatter:
             Properly wrapped LaTeX equation
         """
         # Clean up any existing delimiters
-        latex_code = latex_code.strip()
-        for delim in [r"\[", r"\]", "$$", "$"]:
-            latex_code = latex_code.replace(delim, "")
-        latex_code = latex_code.strip()
+        latex_code = _MATH_DELIMITER_RE.sub("", latex_code.strip()).strip()
 
         if inline:
             return f"${latex_code}$"
@@ -82,22 +104,22 @@ class LaTeXFormatter:
             return latex_code
 
         # Build table wrapper
-        result = "\\begin{table}[htbp]\n\\centering\n"
+        parts = ["\\begin{table}[htbp]\n\\centering\n"]
 
         if caption:
-            result += f"\\caption{{{caption}}}\n"
+            parts.append(f"\\caption{{{caption}}}\n")
 
         # Add the table code if not already wrapped in tabular
         if not latex_code.startswith(r"\begin{tabular"):
-            result += "\\begin{tabular}{c}\n"  # Default to single centered column
-            result += latex_code + "\n"
-            result += "\\end{tabular}\n"
+            parts.append("\\begin{tabular}{c}\n")  # Default to single centered column
+            parts.append(latex_code + "\n")
+            parts.append("\\end{tabular}\n")
         else:
-            result += latex_code + "\n"
+            parts.append(latex_code + "\n")
 
-        result += "\\end{table}"
+        parts.append("\\end{table}")
 
-        return result
+        return "".join(parts)
 
     @staticmethod
     def create_full_document(
@@ -118,27 +140,25 @@ class LaTeXFormatter:
         Returns:
             Complete LaTeX document
         """
-        doc = f"\\documentclass{{{document_class}}}\n\n"
-
-        # Add packages
-        for package in LaTeXFormatter.DOCUMENT_PACKAGES:
-            doc += package + "\n"
-
-        doc += "\n\\begin{document}\n\n"
+        parts = [
+            f"\\documentclass{{{document_class}}}\n\n",
+            LaTeXFormatter._PACKAGES_BLOCK,
+            "\n\\begin{document}\n\n",
+        ]
 
         # Add title if provided
         if title:
-            doc += f"\\title{{{title}}}\n"
+            parts.append(f"\\title{{{title}}}\n")
             if author:
-                doc += f"\\author{{{author}}}\n"
-            doc += "\\maketitle\n\n"
+                parts.append(f"\\author{{{author}}}\n")
+            parts.append("\\maketitle\n\n")
 
         # Add content
-        doc += latex_content + "\n\n"
+        parts.append(latex_content + "\n\n")
 
-        doc += "\\end{document}\n"
+        parts.append("\\end{document}\n")
 
-        return doc
+        return "".join(parts)
 
     @staticmethod
     def extract_latex_code(text: str) -> str:
@@ -154,10 +174,7 @@ class LaTeXFormatter:
             Extracted LaTeX code
         """
         # Remove markdown code fences
-        text = re.sub(r"```latex\n", "", text)
-        text = re.sub(r"```tex\n", "", text)
-        text = re.sub(r"```\n", "", text)
-        text = re.sub(r"```", "", text)
+        text = _CODE_FENCE_RE.sub("", text)
 
         # Remove common explanatory text patterns
         lines = text.split("\n")
@@ -165,19 +182,12 @@ class LaTeXFormatter:
         started = False
 
         for line in lines:
-            line_lower = line.lower().strip()
-
             # Skip explanatory lines
-            if not started:
-                if any(skip in line_lower for skip in [
-                    "here is", "here's", "the latex", "this is",
-                    "i've converted", "converted to", "latex code:",
-                    "explanation:", "note:"
-                ]):
-                    continue
+            if not started and _EXPLANATION_RE.search(line):
+                continue
 
             # Start capturing at first LaTeX-like line
-            if line.strip().startswith("\\") or line.strip().startswith("$"):
+            if line.lstrip().startswith(("\\", "$")):
                 started = True
 
             if started:
@@ -192,46 +202,46 @@ class LaTeXFormatter:
         return result
 
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def detect_content_type(latex_code: str) -> ContentType:
         """
         Detect the type of content in LaTeX code.
 
+        Results are memoized, since the same LaTeX is often produced for
+        different images (the same equation photographed twice).
+
         Args:
             latex_code: LaTeX code to analyze
 
         Returns:
             Detected content type
         """
-        latex_lower = latex_code.lower()
-
-        # Check for document structure
-        if "\\documentclass" in latex_lower or "\\maketitle" in latex_lower:
-            return ContentType.DOCUMENT
-
-        # Check for tables
-        if "\\begin{table" in latex_lower or "\\begin{tabular" in latex_lower:
-            return ContentType.TABLE
-
-        # Check for diagrams/figures
-        if any(keyword in latex_lower for keyword in [
-            "\\begin{tikz", "\\begin{figure", "\\includegraphics"
-        ]):
-            return ContentType.DIAGRAM
-
-        # Check for equations
-        if any(keyword in latex_lower for keyword in [
-            "\\begin{equation", "\\begin{align", "\\[", "$",
-            "\\frac", "\\int", "\\sum", "\\alpha"
-        ]):
-            return ContentType.EQUATION
+        # Every marker below starts with a backslash or is a dollar sign
+        if "\\" not in latex_code and "$" not in latex_code:
+            return ContentType.UNKNOWN
+
+        # One scan for every marker, keeping the highest-priority type seen
+        best = None
+        for match in _CONTENT_TYPE_RE.finditer(latex_code):
+            rank = _CONTENT_TYPE_PRIORITY.index(match.lastgroup)
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+
+        if best is not None:
+            return ContentType(_CONTENT_TYPE_PRIORITY[best])
 
         return ContentType.UNKNOWN
 
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def validate_latex(latex_code: str) -> tuple[bool, Optional[str]]:
         """
         Perform basic validation of LaTeX code.
 
+        Results are memoized like detect_content_type().
+
         Args:
             latex_code: LaTeX code to validate
 
@@ -246,17 +256,25 @@ class LaTeXFormatter:
         if latex_code.count("[") != latex_code.count("]"):
             return False, "Unbalanced brackets: [] count mismatch"
 
-        # Check for balanced environments
-        begins = re.findall(r"\\begin\{(\w+)\}", latex_code)
-        ends = re.findall(r"\\end\{(\w+)\}", latex_code)
-
-        if len(begins) != len(ends):
-            return False, "Unbalanced environments: \\begin{} and \\end{} count mismatch"
+        # Check environments nest properly (no regex scan without any)
+        if "\\begin{" not in latex_code and "\\end{" not in latex_code:
+            logger.info("LaTeX validation passed")
+            return True, None
+
+        open_envs = []
+        for match in _ENV_RE.finditer(latex_code):
+            command, env = match.groups()
+            if command == "begin":
+                open_envs.append(env)
+            elif not open_envs:
+                return False, f"Unbalanced environments: \\end{{{env}}} without \\begin{{{env}}}"
+            elif open_envs[-1] != env:
+                return False, f"Environment '{open_envs[-1]}' closed by \\end{{{env}}}"
+            else:
+                open_envs.pop()
 
-        # Check each environment is properly closed
-        for env in begins:
-            if env not in ends:
-                return False, f"Environment '{env}' opened but not closed"
+        if open_envs:
+            return False, f"Environment '{open_envs[-1]}' opened but not closed"
 
         logger.info("LaTeX validation passed")
         return True, None
@@ -0,0 +1,57 @@
+"""Shared test fixtures."""
+
+import io
+
+import pytest
+
+
+@pytest.fixture
+def png_bytes():
+    """Return a function rendering a blank RGB image of the given size as PNG bytes."""
+    from PIL import Image
+
+    def render(size=(10, 10)) -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGB", size).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    return render
+
+
+@pytest.fixture
+def stub_vision_client():
+    """
+    Return a factory for vision clients that never reach a model.
+
+    The factory takes the response text, or a function called with
+    (image_path, prompt, detail) that returns it. Each client records its
+    calls in a calls list.
+    """
+
+    class StubVisionClient:
+        def __init__(self, respond):
+            self.respond = respond
+            self.calls = []
+
+        def analyze_image(self, image_path, prompt, detail=None):
+            self.calls.append((image_path, prompt, detail))
+            return self.respond(image_path, prompt, detail)
+
+    def make(response):
+        if isinstance(response, str):
+            return StubVisionClient(lambda image_path, prompt, detail: response)
+        return StubVisionClient(response)
+
+    return make
+
+
+@pytest.fixture
+def override_converter():
+    """Return a function that makes the API use a given converter until the test ends."""
+    from image_to_tex.api.routes import app, get_converter
+
+    def override(converter):
+        app.dependency_overrides[get_converter] = lambda: converter
+
+    yield override
+    app.dependency_overrides.clear()
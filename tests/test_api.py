@@ -1,12 +1,28 @@
 """Tests for API module."""
 
+import httpx
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 
 # Note: These are basic structural tests. Full integration tests would require
 # mock images and API keys.
 
 
+@pytest_asyncio.fixture
+async def api_client():
+    """Async client calling the app in-process on the test's event loop.
+
+    Unlike TestClient, no portal thread is started per client. The lifespan
+    handler is not run, so tests override get_converter instead.
+    """
+    from image_to_tex.api.routes import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
 def test_api_import():
     """Test that API modules can be imported."""
     from image_to_tex.api import models, routes
@@ -17,6 +33,8 @@ def test_api_import():
 
 def test_api_models():
     """Test API model definitions."""
+    from pydantic import ValidationError
+
     from image_to_tex.api.models import (
         ConversionRequest,
         ConversionResponse,
@@ -27,6 +45,11 @@ def test_api_models():
     # Test ConversionRequest
     request = ConversionRequest(content_type="equation")
     assert request.content_type == "equation"
+    assert request.detail is None
+    assert ConversionRequest(content_type="table", detail="high").detail == "high"
+    assert ConversionRequest(content_type="TABLE").content_type == "table"
+    assert ConversionRequest(caption="  Results ").caption == "Results"
+    assert ConversionRequest(title="   ").title is None
 
     # Test ConversionResponse
     response = ConversionResponse(
@@ -36,6 +59,8 @@ def test_api_models():
         validation_error=None,
     )
     assert response.latex_code == "E=mc^2"
+    with pytest.raises(ValidationError):
+        response.latex_code = "x"
 
     # Test ErrorResponse
     error = ErrorResponse(error="Test error", detail="Detail")
@@ -50,6 +75,24 @@ def test_api_models():
     assert health.status == "healthy"
 
 
+def test_api_batch_models():
+    """Test batch API model definitions."""
+    from image_to_tex.api.models import (
+        BatchConversionResponse,
+        ConversionResponse,
+        ErrorResponse,
+    )
+
+    response = BatchConversionResponse(
+        results=[
+            {"latex_code": "E=mc^2", "content_type": "equation", "is_valid": True},
+            {"error": "Conversion failed for bad.png", "detail": "Detail"},
+        ]
+    )
+    assert isinstance(response.results[0], ConversionResponse)
+    assert isinstance(response.results[1], ErrorResponse)
+
+
 def test_api_app_creation():
     """Test that FastAPI app can be created."""
     from image_to_tex.api.routes import app
@@ -59,14 +102,195 @@ def test_api_app_creation():
 
 
 @pytest.mark.asyncio
-async def test_api_root_endpoint():
+async def test_api_root_endpoint(api_client):
     """Test root endpoint."""
-    from image_to_tex.api.routes import app
-
-    client = TestClient(app)
-    response = client.get("/")
+    response = await api_client.get("/")
 
     assert response.status_code == 200
     data = response.json()
     assert "message" in data
     assert "version" in data
+
+
+def test_api_health_requires_converter(monkeypatch):
+    """Test the lifespan handler stores the converter on app state."""
+    from image_to_tex.api.routes import app
+
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with TestClient(app) as client:
+        assert app.state.converter is None
+        assert client.get("/health").status_code == 503
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["models_available"]["claude"] is True
+
+
+@pytest.mark.asyncio
+async def test_api_batch_converts_concurrently(api_client, png_bytes, override_converter):
+    """Test batch conversions run in parallel worker threads."""
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    class StubConverter:
+        validate_output = True
+
+        def convert_equation(self, image_path, inline=False, detail=None):
+            # Blocks until both uploads are being converted at once
+            barrier.wait()
+            return "x"
+
+    files = [
+        ("files", (name, png_bytes(size), "image/png"))
+        for name, size in (("a.png", (10, 10)), ("b.png", (20, 10)))
+    ]
+
+    override_converter(StubConverter())
+    response = await api_client.post(
+        "/convert/batch", files=files, data={"content_type": "equation"}
+    )
+
+    assert response.status_code == 200
+    assert [r["latex_code"] for r in response.json()["results"]] == ["x", "x"]
+
+
+@pytest.mark.asyncio
+async def test_api_rejects_mislabelled_upload(api_client, override_converter):
+    """Test uploads are checked by content, not just the declared type."""
+    override_converter(object())
+    response = await api_client.post(
+        "/convert", files={"file": ("eq.png", b"<html></html>", "image/png")}
+    )
+
+    assert response.status_code == 400
+    assert "Unsupported image format" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_api_coalesces_identical_uploads(api_client, png_bytes, override_converter):
+    """Test identical concurrent uploads share one conversion."""
+    import time
+
+    calls = []
+
+    class StubConverter:
+        validate_output = True
+
+        def convert_equation(self, image_path, inline=False, detail=None):
+            calls.append(image_path)
+            # Keep the first conversion in flight while the second arrives
+            time.sleep(0.2)
+            return "x"
+
+    image_bytes = png_bytes()
+    files = [("files", (name, image_bytes, "image/png")) for name in ("a.png", "b.png")]
+
+    override_converter(StubConverter())
+    response = await api_client.post(
+        "/convert/batch", files=files, data={"content_type": "equation"}
+    )
+
+    assert [r["latex_code"] for r in response.json()["results"]] == ["x", "x"]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_api_rejects_truncated_upload(
+    api_client, monkeypatch, stub_vision_client, override_converter
+):
+    """Test an unreadable image spooled to disk is a client error."""
+    from image_to_tex.api import routes
+    from image_to_tex.core.converter import ImageToLaTeXConverter
+
+    monkeypatch.setattr(routes, "MAX_IN_MEM_MB", 0)
+    override_converter(ImageToLaTeXConverter(vision_client=stub_vision_client("x")))
+    response = await api_client.post(
+        "/convert",
+        files={"file": ("eq.png", b"\x89PNG\r\n\x1a\ntruncated", "image/png")},
+    )
+
+    assert response.status_code == 400
+    assert "Image validation failed" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_api_normalizes_form_options(api_client, png_bytes, override_converter):
+    """Test form fields go through ConversionRequest normalization."""
+    calls = []
+
+    class StubConverter:
+        validate_output = True
+
+        def convert_table(self, image_path, caption=None, detail=None):
+            calls.append((caption, detail))
+            return "\\begin{table}\\end{table}"
+
+    files = {"file": ("t.png", png_bytes(), "image/png")}
+
+    override_converter(StubConverter())
+    response = await api_client.post(
+        "/convert",
+        files=files,
+        data={"content_type": "TABLE", "caption": "  Results ", "detail": "high"},
+    )
+    rejected = await api_client.post(
+        "/convert", files=files, data={"content_type": "chart"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["content_type"] == "table"
+    assert calls == [("Results", "high")]
+    assert rejected.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_api_validates_typed_conversions(api_client, png_bytes, override_converter):
+    """Test typed conversions report invalid LaTeX instead of assuming it is valid."""
+
+    class StubConverter:
+        validate_output = True
+
+        def convert_equation(self, image_path, inline=False, detail=None):
+            return "\\begin{equation}\nx"
+
+    override_converter(StubConverter())
+    response = await api_client.post(
+        "/convert",
+        files={"file": ("eq.png", png_bytes(), "image/png")},
+        data={"content_type": "equation"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["is_valid"] is False
+    assert "environment" in response.json()["validation_error"].lower()
+
+
+@pytest.mark.asyncio
+async def test_api_single_flight_survives_cancelled_owner():
+    """Test a joiner reruns the conversion when the owning request is cancelled."""
+    import asyncio
+
+    from image_to_tex.api.routes import _single_flight
+
+    started = asyncio.Event()
+
+    async def never_finishes():
+        started.set()
+        await asyncio.sleep(60)
+
+    async def convert():
+        return "joined"
+
+    owner = asyncio.create_task(_single_flight("key", never_finishes))
+    await started.wait()
+    joiner = asyncio.create_task(_single_flight("key", convert))
+    await asyncio.sleep(0)
+
+    owner.cancel()
+    assert await joiner == "joined"
+    with pytest.raises(asyncio.CancelledError):
+        await owner
@@ -8,26 +8,28 @@ from image_to_tex.core.vision_client import VisionClient, NoAPIKeyError
 from image_to_tex.utils.latex_formatter import ContentType
 
 
+@pytest.fixture(scope="module")
+def vision_client():
+    """Vision client with placeholder keys, built once per module."""
+    return VisionClient(anthropic_api_key="test-key", openai_api_key="test-key")
+
+
+@pytest.fixture(scope="module")
+def converter(vision_client):
+    """Converter sharing the module's vision client."""
+    return ImageToLaTeXConverter(vision_client=vision_client)
+
+
 class TestConverter:
     """Test cases for ImageToLaTeXConverter."""
 
-    def test_converter_initialization(self):
+    def test_converter_initialization(self, converter, vision_client):
         """Test converter can be initialized."""
-        # This will fail if no API keys are set, which is expected
-        try:
-            converter = ImageToLaTeXConverter()
-            assert converter is not None
-            assert converter.vision_client is not None
-        except NoAPIKeyError:
-            pytest.skip("No API keys configured")
+        assert converter is not None
+        assert converter.vision_client is vision_client
 
-    def test_converter_with_invalid_image(self):
+    def test_converter_with_invalid_image(self, converter):
         """Test converter with invalid image path."""
-        try:
-            converter = ImageToLaTeXConverter()
-        except NoAPIKeyError:
-            pytest.skip("No API keys configured")
-
         with pytest.raises(ConversionError):
             converter.convert("nonexistent_image.png")
 
@@ -54,6 +56,184 @@ class TestConverter:
         assert "content_type" in result_dict
         assert result_dict["content_type"] == "equation"
 
+        # Test from_dict round trip
+        restored = ConverterResult.from_dict(result_dict)
+        assert restored.latex_code == result.latex_code
+        assert restored.content_type == ContentType.EQUATION
+
+    def test_default_converter_is_shared(self, monkeypatch):
+        """Test convenience functions reuse a single converter."""
+        from image_to_tex import _default_converter
+
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        _default_converter.cache_clear()
+        try:
+            assert _default_converter() is _default_converter()
+        finally:
+            _default_converter.cache_clear()
+
+    def test_convenience_functions_use_cache(self, tmp_path, monkeypatch):
+        """Test cache=True reuses valid results for the same image content."""
+        import image_to_tex
+        from image_to_tex.core.converter import ConverterResult
+
+        calls = []
+        responses = ["", "x"]
+
+        class StubConverter(ImageToLaTeXConverter):
+            def __init__(self):
+                pass
+
+            def convert(self, image_path, content_type=None, detail=None):
+                calls.append(image_path)
+                latex_code = responses.pop(0) if responses else "x"
+                return ConverterResult(
+                    latex_code=latex_code,
+                    content_type=content_type,
+                    raw_response=latex_code,
+                    is_valid=bool(latex_code),
+                    validation_error=None if latex_code else "model_refusal",
+                )
+
+        monkeypatch.setattr(image_to_tex, "_default_converter", StubConverter)
+        monkeypatch.setenv("IMAGE_TO_TEX_CACHE_DIR", str(tmp_path / "cache"))
+        image_to_tex._default_cache.cache_clear()
+
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(b"image-bytes")
+        try:
+            # A refusal raises and is not cached, so the retry asks again
+            with pytest.raises(ConversionError, match="no LaTeX"):
+                image_to_tex.convert_equation(str(image_path), inline=True, cache=True)
+            assert image_to_tex.convert_equation(str(image_path), inline=True, cache=True) == "$x$"
+            assert image_to_tex.convert_equation(str(image_path), inline=True, cache=True) == "$x$"
+            assert len(calls) == 2
+
+            assert "x" in image_to_tex.convert_equation(str(image_path), cache=True)
+            assert len(calls) == 3
+        finally:
+            image_to_tex._default_cache.cache_clear()
+
+    def test_converter_rejects_truncated_image(self, tmp_path, stub_vision_client):
+        """Test a truncated image raises ConversionError, not a PIL error."""
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"truncated")
+
+        converter = ImageToLaTeXConverter(vision_client=stub_vision_client("x"))
+        with pytest.raises(ConversionError, match="Image validation failed"):
+            converter.convert(image_path)
+        with pytest.raises(ConversionError, match="Image validation failed"):
+            converter.convert(image_path, content_type=ContentType.EQUATION)
+
+    def test_converter_caches_responses(self, tmp_path, png_bytes, stub_vision_client):
+        """Test identical image and prompt reuse the vision model response."""
+        client = stub_vision_client("\\frac{a}{b}")
+
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(png_bytes((20, 10)))
+
+        converter = ImageToLaTeXConverter(vision_client=client)
+        first = converter.convert(image_path)
+        second = converter.convert(image_path)
+        assert len(client.calls) == 1
+        assert first.latex_code == second.latex_code == "\\frac{a}{b}"
+
+        # A different prompt is a different cache entry
+        converter.convert(image_path, content_type=ContentType.EQUATION)
+        assert len(client.calls) == 2
+
+        uncached = ImageToLaTeXConverter(vision_client=client, response_cache_size=0)
+        uncached.convert(image_path)
+        uncached.convert(image_path)
+        assert len(client.calls) == 4
+
+    def test_converter_downscales_large_images(
+        self, tmp_path, tmp_path_factory, monkeypatch, png_bytes, stub_vision_client
+    ):
+        """Test large images are downscaled before reaching the vision model."""
+        from PIL import Image
+
+        from image_to_tex.utils.image_handler import ImageHandler
+
+        monkeypatch.setattr(
+            ImageHandler, "PREPROCESS_CACHE_DIR", tmp_path_factory.mktemp("resized")
+        )
+
+        sent = []
+
+        def respond(image_path, prompt, detail):
+            with Image.open(image_path) as img:
+                sent.append((img.size, detail))
+            return "\\begin{tikzpicture}\\end{tikzpicture}"
+
+        image_path = tmp_path / "diagram.png"
+        image_path.write_bytes(png_bytes((4000, 1000)))
+
+        converter = ImageToLaTeXConverter(
+            vision_client=stub_vision_client(respond), max_dimension=1000
+        )
+        converter.convert(image_path, content_type=ContentType.DIAGRAM)
+
+        assert sent == [((1000, 250), "high")]
+        # No downscaled copy is left next to the source
+        assert list(tmp_path.iterdir()) == [image_path]
+
+    def test_converter_accepts_image_bytes(self, png_bytes, stub_vision_client):
+        """Test images can be converted straight from memory."""
+        import io
+
+        from PIL import Image
+
+        sent = []
+
+        def respond(image_path, prompt, detail):
+            with Image.open(io.BytesIO(image_path)) as img:
+                sent.append(img.size)
+            return "x^2"
+
+        converter = ImageToLaTeXConverter(
+            vision_client=stub_vision_client(respond), max_dimension=1000
+        )
+        result = converter.convert(png_bytes((2000, 500)), content_type=ContentType.EQUATION)
+
+        assert result.latex_code == "x^2"
+        assert sent == [(1000, 250)]
+
+    def test_converter_short_circuits_refusals(self, tmp_path, png_bytes, stub_vision_client):
+        """Test empty or refused responses are invalid and not cached."""
+        responses = ["I'm sorry, I can't read this image.", "   ", "x"]
+
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(png_bytes((20, 10)))
+
+        converter = ImageToLaTeXConverter(
+            vision_client=stub_vision_client(lambda *args: responses.pop(0))
+        )
+        for _ in range(2):
+            result = converter.convert(image_path)
+            assert result.is_valid is False
+            assert result.validation_error == "model_refusal"
+            assert result.content_type == ContentType.UNKNOWN
+            assert result.latex_code == ""
+
+        assert converter.convert(image_path).latex_code == "x"
+
+    def test_typed_helpers_reject_refusals(self, tmp_path, png_bytes, stub_vision_client):
+        """Test the typed helpers raise instead of wrapping an empty refusal."""
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(png_bytes((20, 10)))
+
+        converter = ImageToLaTeXConverter(
+            vision_client=stub_vision_client("I cannot read this image.")
+        )
+        for convert in (
+            converter.convert_equation,
+            converter.convert_table,
+            converter.convert_to_document,
+        ):
+            with pytest.raises(ConversionError, match="no LaTeX"):
+                convert(image_path)
+
 
 class TestVisionClient:
     """Test cases for VisionClient."""
@@ -84,3 +264,149 @@ class TestVisionClient:
         client = VisionClient()
         assert client.anthropic_client is None
         assert client.openai_client is not None
+
+    def test_vision_client_skips_unconfigured_models(self, monkeypatch):
+        """Test a primary model without an API key is replaced at init."""
+        from image_to_tex.core.vision_client import ModelProvider
+
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        client = VisionClient(
+            primary_model=ModelProvider.CLAUDE,
+            fallback_model=ModelProvider.OPENAI,
+            openai_api_key="test-key",
+        )
+        assert client.primary_model == ModelProvider.OPENAI
+        assert client.fallback_model == ModelProvider.NONE
+
+        client = VisionClient(
+            primary_model=ModelProvider.CLAUDE,
+            fallback_model=ModelProvider.CLAUDE,
+            anthropic_api_key="test-key",
+        )
+        assert client.fallback_model == ModelProvider.NONE
+
+    def test_encode_image_from_file(self, tmp_path, monkeypatch, png_bytes):
+        """Test files are encoded to base64 with their media type."""
+        import base64
+
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        client = VisionClient()
+
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(png_bytes((20, 10)))
+
+        image_data, media_type = client._encode_image(image_path)
+        assert base64.b64decode(image_data) == image_path.read_bytes()
+        assert media_type == "image/png"
+        assert client._encode_image(image_path.read_bytes()) == (image_data, media_type)
+
+    def test_fallback_reuses_encoded_image(self, monkeypatch):
+        """Test the fallback model reuses the primary model's image payload."""
+        from types import SimpleNamespace
+
+        client = VisionClient(
+            primary_model="claude",
+            fallback_model="openai",
+            anthropic_api_key="test-key",
+            openai_api_key="test-key",
+        )
+
+        encodes = []
+
+        def encode_image(image_path):
+            encodes.append(image_path)
+            return "ZGF0YQ==", "image/png"
+
+        def unavailable(**kwargs):
+            raise RuntimeError("unavailable")
+
+        def completion(**kwargs):
+            message = SimpleNamespace(content="x")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        monkeypatch.setattr(client, "_encode_image", encode_image)
+        monkeypatch.setattr(client.anthropic_client.messages, "create", unavailable)
+        monkeypatch.setattr(client.openai_client.chat.completions, "create", completion)
+
+        assert client.analyze_image(b"image-bytes", "prompt") == "x"
+        assert encodes == [b"image-bytes"]
+
+    @pytest.mark.asyncio
+    async def test_analyze_image_async_runs_concurrently(self, monkeypatch):
+        """Test async analysis lets several model calls overlap."""
+        import asyncio
+        from types import SimpleNamespace
+
+        from image_to_tex.core.vision_client import ModelProvider
+
+        client = VisionClient(
+            primary_model=ModelProvider.CLAUDE,
+            fallback_model=ModelProvider.NONE,
+            anthropic_api_key="test-key",
+        )
+
+        in_flight = []
+        peak = []
+
+        async def create(**kwargs):
+            in_flight.append(kwargs)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.05)
+            in_flight.pop()
+            return SimpleNamespace(content=[SimpleNamespace(text="x")])
+
+        monkeypatch.setattr(client, "_encode_image", lambda image_path: ("ZGF0YQ==", "image/png"))
+        monkeypatch.setattr(client.async_anthropic_client.messages, "create", create)
+
+        results = await asyncio.gather(
+            *(client.analyze_image_async(b"image-bytes", "prompt") for _ in range(3))
+        )
+
+        assert results == ["x", "x", "x"]
+        assert max(peak) == 3
+
+    @pytest.mark.asyncio
+    async def test_analyze_image_async_falls_back(self, monkeypatch):
+        """Test async analysis falls back like analyze_image() does."""
+        from types import SimpleNamespace
+
+        from image_to_tex.core.vision_client import VisionClientError
+
+        client = VisionClient(
+            primary_model="claude",
+            fallback_model="openai",
+            anthropic_api_key="test-key",
+            openai_api_key="test-key",
+        )
+
+        async def unavailable(**kwargs):
+            raise RuntimeError("unavailable")
+
+        async def completion(**kwargs):
+            message = SimpleNamespace(content="x")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        monkeypatch.setattr(client, "_encode_image", lambda image_path: ("ZGF0YQ==", "image/png"))
+        monkeypatch.setattr(client.async_anthropic_client.messages, "create", unavailable)
+        monkeypatch.setattr(client.async_openai_client.chat.completions, "create", completion)
+
+        assert await client.analyze_image_async(b"image-bytes", "prompt") == "x"
+
+        monkeypatch.setattr(client.async_openai_client.chat.completions, "create", unavailable)
+        with pytest.raises(VisionClientError, match="Both primary and fallback"):
+            await client.analyze_image_async(b"image-bytes", "prompt")
+
+    def test_vision_client_max_retries(self):
+        """Test the retry count is passed to every SDK client."""
+        client = VisionClient(
+            anthropic_api_key="test-key", openai_api_key="test-key", max_retries=5
+        )
+
+        # Async clients are only built when first used
+        assert client._async_anthropic_client is None
+        assert client._async_openai_client is None
+
+        assert client.anthropic_client.max_retries == 5
+        assert client.async_anthropic_client.max_retries == 5
+        assert client.openai_client.max_retries == 5
+        assert client.async_openai_client.max_retries == 5
@@ -1,6 +1,8 @@
 """Tests for utility modules."""
 
 import pytest
+from image_to_tex.utils.cache import ConversionCache
+from image_to_tex.utils.image_handler import ImageHandler, ImageHandlerError
 from image_to_tex.utils.latex_formatter import LaTeXFormatter, ContentType
 
 
@@ -19,6 +21,11 @@ class TestLaTeXFormatter:
         assert "E = mc^2" in result
         assert "\\end{equation}" in result
 
+    def test_wrap_equation_strips_delimiters(self):
+        """Test existing math delimiters are removed before wrapping."""
+        assert LaTeXFormatter.wrap_equation("$$E = mc^2$$", inline=True) == "$E = mc^2$"
+        assert LaTeXFormatter.wrap_equation(" \\[E = mc^2\\] ", inline=True) == "$E = mc^2$"
+
     def test_detect_content_type_equation(self):
         """Test content type detection for equations."""
         latex_code = "\\begin{equation}\nE = mc^2\n\\end{equation}"
@@ -37,6 +44,17 @@ class TestLaTeXFormatter:
         content_type = LaTeXFormatter.detect_content_type(latex_code)
         assert content_type == ContentType.DOCUMENT
 
+    def test_detect_content_type_prefers_structure(self):
+        """Test the highest-priority marker wins regardless of position."""
+        latex_code = "$x$\n\\begin{figure}\n\\begin{TABULAR}{c}\na\n\\end{tabular}"
+        content_type = LaTeXFormatter.detect_content_type(latex_code)
+        assert content_type == ContentType.TABLE
+
+    def test_detect_content_type_plain_text(self):
+        """Test text without LaTeX markup is not classified."""
+        content_type = LaTeXFormatter.detect_content_type("E = mc^2 over a table")
+        assert content_type == ContentType.UNKNOWN
+
     def test_validate_latex_balanced_braces(self):
         """Test LaTeX validation with balanced braces."""
         latex_code = "\\frac{a}{b}"
@@ -58,6 +76,23 @@ class TestLaTeXFormatter:
         assert is_valid is False
         assert "environment" in error.lower()
 
+    def test_validate_latex_misnested_environments(self):
+        """Test LaTeX validation with environments closed out of order."""
+        latex_code = "\\begin{a}\\begin{b}x\\end{a}\\end{b}"
+        is_valid, error = LaTeXFormatter.validate_latex(latex_code)
+        assert is_valid is False
+        assert "environment" in error.lower()
+
+        latex_code = "\\begin{align*}\na \\\\ b\n\\end{align*}"
+        assert LaTeXFormatter.validate_latex(latex_code) == (True, None)
+
+    def test_validate_latex_is_memoized(self):
+        """Test repeated validation of the same code reuses the verdict."""
+        LaTeXFormatter.validate_latex.cache_clear()
+        LaTeXFormatter.validate_latex("\\frac{a}{b}")
+        assert LaTeXFormatter.validate_latex("\\frac{a}{b}") == (True, None)
+        assert LaTeXFormatter.validate_latex.cache_info().hits == 1
+
     def test_extract_latex_code_with_markdown(self):
         """Test extracting LaTeX from markdown code blocks."""
         text = "```latex\n\\frac{a}{b}\n```"
@@ -65,6 +100,12 @@ class TestLaTeXFormatter:
         assert "\\frac{a}{b}" in result
         assert "```" not in result
 
+    def test_extract_latex_code_skips_explanations(self):
+        """Test leading commentary and tex fences are dropped."""
+        text = "Here's the LaTeX code:\n```tex\n\\frac{a}{b}\n```\nNote: kept after start"
+        result = LaTeXFormatter.extract_latex_code(text)
+        assert result == "\\frac{a}{b}\nNote: kept after start"
+
     def test_create_full_document(self):
         """Test creating a full LaTeX document."""
         content = "This is the content."
@@ -86,3 +127,156 @@ class TestLaTeXFormatter:
         assert "\\caption{Test Table}" in result
         assert "\\end{table}" in result
         assert table_code in result
+
+
+class TestConversionCache:
+    """Test cases for ConversionCache."""
+
+    def test_make_key_uses_content_and_options(self, tmp_path):
+        """Test keys follow image content and options, not file names."""
+        first = tmp_path / "a.png"
+        second = tmp_path / "b.png"
+        first.write_bytes(b"image-bytes")
+        second.write_bytes(b"image-bytes")
+
+        key = ConversionCache.make_key(first, inline=True)
+        assert key == ConversionCache.make_key(second, inline=True)
+        assert key != ConversionCache.make_key(first, inline=False)
+
+        second.write_bytes(b"other-bytes")
+        assert key != ConversionCache.make_key(second, inline=True)
+
+    def test_get_and_set(self, tmp_path):
+        """Test storing and retrieving cache entries."""
+        cache = ConversionCache(tmp_path / "cache")
+
+        assert cache.get("missing") is None
+
+        cache.set("key", {"value": "E = mc^2"})
+        assert cache.get("key") == {"value": "E = mc^2"}
+
+
+class TestImageHandler:
+    """Test cases for ImageHandler."""
+
+    def test_validate_image_path_and_bytes(self, tmp_path, png_bytes):
+        """Test images validate from a path or from raw bytes."""
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(png_bytes((20, 10)))
+
+        assert ImageHandler.validate_image(image_path) is True
+        assert ImageHandler.validate_image(image_path.read_bytes()) is True
+
+    def test_validate_image_rejects_missing_and_directories(self, tmp_path):
+        """Test validation errors for paths that are not image files."""
+        with pytest.raises(ImageHandlerError, match="not found"):
+            ImageHandler.validate_image(tmp_path / "missing.png")
+
+        with pytest.raises(ImageHandlerError, match="not a file"):
+            ImageHandler.validate_image(tmp_path)
+
+    def test_validate_image_fast_path_checks_leading_bytes(self, tmp_path):
+        """Test truncated images fail with ImageHandlerError on every path."""
+        image_path = tmp_path / "eq.png"
+        image_path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"truncated")
+
+        with pytest.raises(ImageHandlerError, match="Failed to open image"):
+            ImageHandler.validate_image(image_path, fast=False)
+
+        # The fast path only sniffs the format; the header read fails later
+        with pytest.raises(ImageHandlerError, match="Failed to open image"):
+            ImageHandler.guess_content_type(image_path)
+
+        with pytest.raises(ImageHandlerError, match="Failed to open image"):
+            ImageHandler.preprocess_image(image_path)
+
+        image_path.write_bytes(b"<html></html>")
+        with pytest.raises(ImageHandlerError, match="Unsupported image format"):
+            ImageHandler.validate_image(image_path)
+
+    def test_guess_content_type(self, png_bytes):
+        """Test content type guesses from image dimensions."""
+        assert ImageHandler.guess_content_type(png_bytes((900, 120))) == ContentType.EQUATION
+        assert ImageHandler.guess_content_type(png_bytes((850, 1100))) == ContentType.DOCUMENT
+        assert ImageHandler.guess_content_type(png_bytes((400, 300))) is None
+
+    def test_sniff_format(self):
+        """Test image formats are identified from their leading bytes."""
+        import io
+
+        from PIL import Image
+
+        for image_format in ("PNG", "JPEG", "GIF", "WEBP", "BMP", "TIFF"):
+            buffer = io.BytesIO()
+            Image.new("RGB", (10, 10)).save(buffer, format=image_format)
+            assert ImageHandler.sniff_format(buffer.getvalue()[:16]) == image_format
+
+        assert ImageHandler.sniff_format(b"not an image") is None
+
+    def test_image_info_reuses_unchanged_file(self, tmp_path):
+        """Test image metadata is read once per unchanged file."""
+        import os
+
+        from PIL import Image
+
+        from image_to_tex.utils.image_handler import _image_meta
+
+        image_path = tmp_path / "eq.png"
+        Image.new("RGB", (20, 10)).save(image_path)
+
+        _image_meta.cache_clear()
+        ImageHandler.validate_image(image_path, fast=False)
+        info = ImageHandler.get_image_info(image_path)
+        assert info["size"] == (20, 10)
+        assert _image_meta.cache_info().hits == 1
+
+        # Editing the file invalidates the cached metadata
+        Image.new("RGB", (30, 10)).save(image_path)
+        os.utime(image_path, ns=(0, 0))
+        assert ImageHandler.get_image_info(image_path)["size"] == (30, 10)
+        _image_meta.cache_clear()
+
+    def test_preprocess_image_reuses_resized_copy(self, tmp_path, monkeypatch):
+        """Test resized copies are cached outside the source directory."""
+        from PIL import Image
+
+        cache_dir = tmp_path / "resized"
+        monkeypatch.setattr(ImageHandler, "PREPROCESS_CACHE_DIR", cache_dir)
+        monkeypatch.setattr(ImageHandler, "PREPROCESS_CACHE_SIZE", 1)
+
+        source_dir = tmp_path / "images"
+        source_dir.mkdir()
+        first = source_dir / "a.png"
+        second = source_dir / "b.png"
+        Image.new("RGB", (400, 100)).save(first)
+        Image.new("RGB", (100, 400)).save(second)
+
+        resized = ImageHandler.preprocess_image(first, max_dimension=200)
+        assert resized.parent == cache_dir
+        with Image.open(resized) as img:
+            assert img.size == (200, 50)
+        assert ImageHandler.preprocess_image(first, max_dimension=200) == resized
+
+        # Older copies are pruned beyond PREPROCESS_CACHE_SIZE
+        ImageHandler.preprocess_image(second, max_dimension=200)
+        assert not resized.exists()
+        assert len(list(cache_dir.iterdir())) == 1
+        assert sorted(source_dir.iterdir()) == [first, second]
+
+    def test_preprocess_image_falls_back_to_bytes(self, tmp_path, monkeypatch):
+        """Test an unusable resize cache returns the resized image in memory."""
+        import io
+
+        from PIL import Image
+
+        # A file where the cache directory should be makes every cache access fail
+        blocked = tmp_path / "not-a-dir"
+        blocked.write_bytes(b"")
+        monkeypatch.setattr(ImageHandler, "PREPROCESS_CACHE_DIR", blocked)
+
+        image_path = tmp_path / "a.png"
+        Image.new("RGB", (400, 100)).save(image_path)
+
+        resized = ImageHandler.preprocess_image(image_path, max_dimension=200)
+        with Image.open(io.BytesIO(resized)) as img:
+            assert img.size == (200, 50)